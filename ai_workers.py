@@ -0,0 +1,257 @@
+# Enemy movement, optionally spread over worker processes. update_enemy_ai()
+# decides on the main thread what every enemy does this tick (that needs the
+# player, the path scheduler and the RNG) and leaves one move order per enemy
+# in the pool's move_* columns; move() then steers the movers and collides
+# them against the loaded window. Enemies only collide with tiles, never with
+# each other, so any split of the movers gives exactly the same positions as
+# one pass.
+#
+# AIWorkers(processes=k) sorts the movers by map region, cuts them into up to
+# k + 1 contiguous runs of equal size and moves run 0 on the main thread while
+# k forked workers move the others (Linux only; create the pool before
+# pygame.init() or any other thread starts). The walkability grid lives in a
+# multiprocessing.shared_memory block (recopied only when the grid version
+# changes) and positions / move orders in shared column arrays; the pipes only
+# carry a handful of scalars per tick. Every enemy belongs to one run and only
+# its own slots are written, so merging back into the pool is a plain copy
+# and the result does not depend on which worker finishes first.
+
+import sys, multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+import collision, enemy_pool
+
+# movers per run below which splitting costs more than it saves
+MIN_BATCH = 256
+# movers are grouped in REGION x REGION tile squares before being cut into runs
+REGION = 16
+# pool columns copied to the workers; only x and y come back
+SHARED = ("x", "y", "radius", "speed", "move_order", "move_x", "move_y")
+LAYOUT = [(name, enemy_pool.COLUMNS[name]) for name in SHARED] + [("index", np.int64)]
+
+def move(grid, tile_size, ox, oy, px, py, cols, idx):
+    # carry out the move orders of enemies idx: x step then y step, each
+    # against the other axis' latest position; (ox, oy) is the window origin
+    if len(idx) == 0:
+        return
+    x = cols.x[idx]
+    y = cols.y[idx]
+    order = cols.move_order[idx]
+    ax = cols.move_x[idx]
+    ay = cols.move_y[idx]
+    speed = cols.speed[idx]
+    mx = np.zeros(len(idx))
+    my = np.zeros(len(idx))
+
+    wander = order == enemy_pool.MOVE_WANDER
+    mx[wander] = ax[wander]
+    my[wander] = ay[wander]
+    way = order == enemy_pool.MOVE_WAYPOINT
+    if way.any():
+        wx = ax[way] - x[way]
+        wy = ay[way] - y[way]
+        wd = np.hypot(wx, wy)
+        mx[way] = wx / wd * speed[way]
+        my[way] = wy / wd * speed[way]
+    direct = order == enemy_pool.MOVE_DIRECT
+    if direct.any():
+        dx = px - x[direct]
+        dy = py - y[direct]
+        dist = np.hypot(dx, dy)
+        mx[direct] = dx / dist * speed[direct]
+        my[direct] = dy / dist * speed[direct]
+
+    moving = (mx != 0) | (my != 0)
+    idx = idx[moving]
+    x, y, mx, my = x[moving], y[moving], mx[moving], my[moving]
+    radius = cols.radius[idx]
+    # moves longer than half a tile (coarse-tier wander) go in equal sub-steps
+    # so they can't hop over a wall; an axis stops at its first blocked one
+    sub = np.maximum(np.ceil(np.maximum(np.abs(mx), np.abs(my)) / (tile_size / 2)), 1)
+    mx /= sub
+    my /= sub
+    sx = ox * tile_size
+    sy = oy * tile_size
+    free = np.ones(len(idx), dtype=bool)
+    for s in range(int(sub.max())):
+        go = np.flatnonzero(free & (s < sub))
+        nx = x[go] + mx[go]
+        ok = collision.can_move_many(grid, tile_size, nx - sx, y[go] - sy, radius[go])
+        x[go[ok]] = nx[ok]
+        free[go[~ok]] = False
+    free[:] = True
+    for s in range(int(sub.max())):
+        go = np.flatnonzero(free & (s < sub))
+        ny = y[go] + my[go]
+        ok = collision.can_move_many(grid, tile_size, x[go] - sx, ny - sy, radius[go])
+        y[go[ok]] = ny[ok]
+        free[go[~ok]] = False
+    cols.x[idx] = x
+    cols.y[idx] = y
+
+def _block_size(capacity):
+    return sum(-(-capacity * np.dtype(dtype).itemsize // 8) * 8 for _, dtype in LAYOUT)
+
+class Columns:
+    # LAYOUT's arrays back to back in one shared memory block
+    def __init__(self, buf, capacity):
+        offset = 0
+        for name, dtype in LAYOUT:
+            setattr(self, name, np.ndarray(capacity, dtype=dtype, buffer=buf, offset=offset))
+            offset += -(-capacity * np.dtype(dtype).itemsize // 8) * 8
+
+class SharedGrid:
+    # the part of grid.Grid that collision.can_move_many reads
+    def __init__(self, buf, w, h):
+        self.w = w
+        self.h = h
+        self.solid = np.ndarray(w * h, dtype=np.uint8, buffer=buf)
+
+def _worker(conn):
+    # attach to the blocks named in each job, move one run, reply True (or the error)
+    ent_name = grid_key = None
+    ent_block = grid_block = cols = shared_grid = None
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        try:
+            name, capacity, gname, w, h, tile_size, ox, oy, px, py, start, stop = job
+            if name != ent_name:
+                cols = None
+                if ent_block is not None:
+                    ent_block.close()
+                ent_block = shared_memory.SharedMemory(name=name)
+                cols = Columns(ent_block.buf, capacity)
+                ent_name = name
+            if (gname, w, h) != grid_key:
+                shared_grid = None
+                if grid_block is not None:
+                    grid_block.close()
+                grid_block = shared_memory.SharedMemory(name=gname)
+                shared_grid = SharedGrid(grid_block.buf, w, h)
+                grid_key = (gname, w, h)
+            move(shared_grid, tile_size, ox, oy, px, py, cols, cols.index[start:stop])
+            conn.send(True)
+        except Exception as ex:
+            conn.send(repr(ex))
+
+class AIWorkers:
+    def __init__(self, processes, min_batch=MIN_BATCH):
+        self.min_batch = min_batch
+        self.conns = []
+        self.procs = []
+        self.entities = None
+        self.cols = None
+        self.capacity = 0
+        self.grid_block = None
+        self.grid = None
+        self.grid_version = None
+        # runs the last move() was cut into; 1 = moved inline
+        self.parts = 1
+        if not sys.platform.startswith("linux"):
+            # spawn would re-run the game's module-level setup in every worker,
+            # and fork isn't safe on macOS once system frameworks are loaded
+            print("AI workers are only supported on Linux, moving enemies on the main thread")
+            return
+        # started before forking so the workers share it and don't each warn
+        # about blocks they attached to but the main process unlinked
+        resource_tracker.ensure_running()
+        ctx = multiprocessing.get_context("fork")
+        for _ in range(processes):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker, args=(child,), daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+
+    def __len__(self):
+        return len(self.procs)
+
+    def move(self, grid, tile_size, ox, oy, px, py, pool, idx):
+        # same contract as move(); pool is the EnemyPool
+        parts = min(len(self.conns) + 1, len(idx) // self.min_batch)
+        self.parts = max(parts, 1)
+        if parts < 2:
+            move(grid, tile_size, ox, oy, px, py, pool, idx)
+            return
+        n = len(pool)
+        self._share(grid, n)
+        cols = self.cols
+        for name in SHARED:
+            getattr(cols, name)[:n] = getattr(pool, name)[:n]
+        # runs of neighbouring movers: sort by region square, then cut evenly
+        rx = (np.floor_divide(pool.x[idx], tile_size).astype(np.int64) - ox) // REGION
+        ry = (np.floor_divide(pool.y[idx], tile_size).astype(np.int64) - oy) // REGION
+        ordered = idx[np.argsort(ry * (grid.w // REGION + 1) + rx, kind="stable")]
+        m = len(ordered)
+        cols.index[:m] = ordered
+        cuts = [m * p // parts for p in range(parts + 1)]
+        try:
+            for p in range(1, parts):
+                self.conns[p - 1].send((self.entities.name, self.capacity, self.grid_block.name,
+                                        grid.w, grid.h, tile_size, ox, oy, px, py, cuts[p], cuts[p + 1]))
+            move(grid, tile_size, ox, oy, px, py, cols, ordered[:cuts[1]])
+            replies = [self.conns[p - 1].recv() for p in range(1, parts)]
+            failed = next((r for r in replies if r is not True), None)
+        except (EOFError, OSError) as ex:
+            failed = repr(ex)
+        if failed is not None:
+            # the pool's own columns are untouched: redo the whole batch here
+            print(f"AI worker failed ({failed}), moving enemies on the main thread from now on")
+            cols = None
+            self.close()
+            self.parts = 1
+            move(grid, tile_size, ox, oy, px, py, pool, idx)
+            return
+        pool.x[idx] = cols.x[idx]
+        pool.y[idx] = cols.y[idx]
+
+    def _share(self, grid, n):
+        if n > self.capacity:
+            capacity = max(n, 2 * self.capacity, 1024)
+            self.cols = None
+            self._release(self.entities)
+            self.entities = shared_memory.SharedMemory(create=True, size=_block_size(capacity))
+            self.cols = Columns(self.entities.buf, capacity)
+            self.capacity = capacity
+        if self.grid is None or (self.grid.w, self.grid.h) != (grid.w, grid.h):
+            self.grid = None
+            self._release(self.grid_block)
+            self.grid_block = shared_memory.SharedMemory(create=True, size=grid.w * grid.h)
+            self.grid = SharedGrid(self.grid_block.buf, grid.w, grid.h)
+            self.grid_version = None
+        if self.grid_version != grid.version:
+            self.grid.solid[:] = np.frombuffer(grid.solid, dtype=np.uint8)
+            self.grid_version = grid.version
+
+    def _release(self, block):
+        if block is not None:
+            block.close()
+            block.unlink()
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for proc in self.procs:
+            proc.join(1.0)
+            if proc.is_alive():
+                proc.terminate()
+        for conn in self.conns:
+            conn.close()
+        self.conns = []
+        self.procs = []
+        self.cols = None
+        self.grid = None
+        self._release(self.entities)
+        self._release(self.grid_block)
+        self.entities = None
+        self.grid_block = None
+        self.capacity = 0
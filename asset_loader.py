@@ -0,0 +1,107 @@
+# Lazy asset loading: callers get a handle holding a placeholder right away,
+# a worker thread does the decode work, and the main thread swaps the result
+# in (convert_alpha and friends need the display, so they run in pump()).
+
+import threading, heapq, itertools
+from collections import deque
+
+PRIORITY_VISIBLE = 0      # on screen right now
+PRIORITY_NORMAL = 10
+PRIORITY_BACKGROUND = 20
+
+class AssetHandle:
+    def __init__(self, key, placeholder, priority):
+        self.key = key
+        self.value = placeholder
+        self.ready = False
+        self.priority = priority
+        self.state = "queued"   # queued -> loading -> done
+
+class AssetLoader:
+    def __init__(self):
+        self._cv = threading.Condition()
+        self._heap = []
+        self._pending = {}
+        self._done = deque()
+        self._seq = itertools.count()
+        self._thread = None
+
+    def submit(self, key, work, finish, placeholder=None, priority=PRIORITY_NORMAL):
+        # work() runs on the worker thread; finish(result) runs in pump() on the
+        # main thread and its return value replaces the placeholder
+        handle = AssetHandle(key, placeholder, priority)
+        with self._cv:
+            self._pending[key] = (handle, work, finish)
+            heapq.heappush(self._heap, (priority, next(self._seq), key, handle))
+            self._cv.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="asset-loader", daemon=True)
+                self._thread.start()
+        return handle
+
+    def prioritize(self, key, priority):
+        with self._cv:
+            entry = self._pending.get(key)
+            if entry is None:
+                return
+            handle = entry[0]
+            if handle.state == "queued" and priority < handle.priority:
+                # the old heap entry goes stale and is skipped when popped
+                handle.priority = priority
+                heapq.heappush(self._heap, (priority, next(self._seq), key, handle))
+                self._cv.notify()
+
+    def is_pending(self, key):
+        with self._cv:
+            return key in self._pending
+
+    def idle(self):
+        with self._cv:
+            return not self._pending
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while not self._heap:
+                    self._cv.wait()
+                priority, _, key, handle = heapq.heappop(self._heap)
+                if handle.state != "queued" or priority != handle.priority:
+                    continue
+                handle.state = "loading"
+                _, work, finish = self._pending[key]
+            try:
+                result = work()
+            except Exception as ex:
+                print(f"Background load of '{key}' failed: {ex}")
+                result = None
+            with self._cv:
+                self._done.append((handle, finish, result))
+                self._cv.notify_all()
+
+    def pump(self):
+        # main thread: install whatever the worker finished since last frame
+        installed = 0
+        while True:
+            with self._cv:
+                if not self._done:
+                    break
+                handle, finish, result = self._done.popleft()
+            if result is not None:
+                handle.value = finish(result)
+            handle.ready = True
+            handle.state = "done"
+            with self._cv:
+                if self._pending.get(handle.key, (None,))[0] is handle:
+                    del self._pending[handle.key]
+            installed += 1
+        return installed
+
+    def wait_idle(self, timeout=None):
+        # blocks the caller until everything submitted so far is installed
+        while True:
+            self.pump()
+            with self._cv:
+                if not self._pending:
+                    return True
+                if not self._done and not self._cv.wait(timeout):
+                    return False
@@ -0,0 +1,269 @@
+# Headless benchmark harness. Runs the real game update and draw code for N
+# fixed ticks under the SDL dummy video driver, with a seeded RNG and a
+# scripted player, and reports ticks/sec, per-subsystem time and allocations.
+# Save a run with --json and pass it back with --baseline to compare a change
+# against it.
+#
+#   python bench.py [--ticks 600] [--enemies 1000] [--seed 1] [--no-draw]
+#                   [--map 1024x1024] [--workers 3] [--json out.json] [--baseline before.json]
+
+import os, sys, gc, json, time, random, hashlib, argparse, tracemalloc
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+# (name, functions); a subsystem's time includes everything those functions call
+SUBSYSTEMS = [
+    ("player", ["handle_player_movement"]),
+    ("enemy AI", ["update_lod", "update_enemy_ai", "tick_respawns"]),
+    ("pathfinding", ["request_stale_paths", "service_path_requests"]),
+    ("combat", ["perform_attack"]),
+    ("spatial sync", ["sync_enemy_index"]),
+    ("animation", ["tick_player_anim", "tick_enemy_anim"]),
+    ("draw world", ["draw_world"]),
+    ("draw entities", ["draw_afterimages", "draw_do_not_press_button", "draw_enemies",
+                       "draw_npcs", "draw_player", "draw_sparks_and_flash"]),
+    ("present + HUD", ["present_world", "hp_text_surface", "draw_dialogue_box"]),
+]
+
+class Keys:
+    def __init__(self, held):
+        self.held = held
+
+    def __getitem__(self, key):
+        return key in self.held
+
+class ScriptedInput:
+    # a fixed, repeating play pattern: walk a loop, swing at whatever is
+    # closest, dodge and talk now and then
+    def __init__(self, game):
+        self.game = game
+        pg = game.pygame
+        self.moves = [{pg.K_d}, {pg.K_d, pg.K_s}, {pg.K_s}, {pg.K_a},
+                      {pg.K_a, pg.K_w}, {pg.K_w}, set(), {pg.K_d, pg.K_w}]
+
+    def keys(self, tick):
+        return Keys(self.moves[(tick // 45) % len(self.moves)])
+
+    def act(self, tick):
+        game = self.game
+        player = game.player
+        if tick % 20 == 0:
+            target = game.enemy_index.nearest(player.x, player.y, 200, accept=lambda e: not e.dead)
+            if target is not None:
+                aim = (target.x, target.y)
+            else:
+                aim = (player.x + 50, player.y)
+            game.perform_attack(((aim[0] - game.view_x) * game.ZOOM, (aim[1] - game.view_y) * game.ZOOM))
+        if tick % 120 == 60:
+            game.player_dodge_towards_cursor()
+        if tick % 300 == 150:
+            game.start_talking_nearest()
+
+class Profiler:
+    def __init__(self, game):
+        self.time = {}
+        self.calls = {}
+        self.alloc = {}
+        self.trace_alloc = False
+        for _, names in SUBSYSTEMS:
+            for name in names:
+                self._wrap(game, name)
+
+    def _wrap(self, game, name):
+        fn = getattr(game, name)
+        self.time[name] = 0.0
+        self.calls[name] = 0
+        self.alloc[name] = 0
+        def timed(*args, **kwargs):
+            if self.trace_alloc:
+                before = tracemalloc.get_traced_memory()[0]
+            t = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.time[name] += time.perf_counter() - t
+                self.calls[name] += 1
+                if self.trace_alloc:
+                    self.alloc[name] += tracemalloc.get_traced_memory()[0] - before
+        setattr(game, name, timed)
+
+    def reset(self):
+        for name in self.time:
+            self.time[name] = 0.0
+            self.calls[name] = 0
+            self.alloc[name] = 0
+
+def populate(game, count):
+    # where the game itself spawns: floor tiles the player can reach
+    game.enemies.clear()
+    for _ in range(count):
+        game.enemies.append(game.create_enemy(*game.random_spawn_point()))
+    game.reindex_enemies()
+
+def run_ticks(game, script, start, count, draw):
+    for tick in range(start, start + count):
+        keys = script.keys(tick)
+        script.act(tick)
+        game.simulate_tick(keys)
+        # the scripted player never dies, so every run covers the same ticks
+        game.player.hp = 100
+        # the view the mouse maps through, drawn or not
+        game.begin_render(1.0)
+        if draw:
+            game.draw_scene(keys)
+            game.fx_pool.end_frame()
+
+def state_digest(game):
+    # same seed + same behaviour => same digest; a perf change should not move it
+    pool = game.enemies
+    n = pool.n
+    h = hashlib.sha1()
+    h.update(repr((round(game.player.x, 6), round(game.player.y, 6))).encode())
+    for col in (pool.x, pool.y, pool.hp, pool.state):
+        h.update(col[:n].tobytes())
+    return h.hexdigest()[:12]
+
+def surface_counts(game):
+    return {
+        "fx_pool": game.fx_pool.created,
+        "fx_sprites": game.fx_sprites.created,
+        "text_cache": game.text_cache.created,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless simulation benchmark")
+    parser.add_argument("--ticks", type=int, default=600)
+    parser.add_argument("--enemies", type=int, default=None, help="default: the game's own spawn")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-draw", action="store_true", help="simulation only")
+    parser.add_argument("--map", help="map size WxH (default: the game's own)")
+    parser.add_argument("--workers", type=int, default=0, help="AI worker processes (default: none)")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json result")
+    args = parser.parse_args()
+
+    if args.map:
+        os.environ["NIGHTFALL_MAP_SIZE"] = args.map
+    os.environ["NIGHTFALL_AI_WORKERS"] = str(args.workers)
+    random.seed(args.seed)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import main as game
+
+    # let queued assets finish so every run draws the same sprites
+    game.loader.wait_idle(30.0)
+    game.pump_assets()
+    if args.enemies is not None:
+        populate(game, args.enemies)
+
+    draw = not args.no_draw
+    script = ScriptedInput(game)
+    profiler = Profiler(game)
+
+    # warm caches (chunks, sprites, flow field) before measuring
+    warmup = min(60, args.ticks)
+    run_ticks(game, script, 0, warmup, draw)
+    profiler.reset()
+    game.pathing.reset_stats()
+
+    surfaces_before = surface_counts(game)
+    gc.collect()
+    gc_before = sum(stat["collections"] for stat in gc.get_stats())
+    t = time.perf_counter()
+    run_ticks(game, script, warmup, args.ticks, draw)
+    elapsed = time.perf_counter() - t
+    gc_runs = sum(stat["collections"] for stat in gc.get_stats()) - gc_before
+    surfaces = {k: v - surfaces_before[k] for k, v in surface_counts(game).items()}
+    digest = state_digest(game)
+    timings = dict(profiler.time)
+    calls = dict(profiler.calls)
+    pathing = game.pathing
+    paths = {"served": pathing.served, "searches": pathing.searches, "rejected": pathing.rejected,
+             "searches_per_sec": pathing.searches / elapsed,
+             "cache_hit_rate": pathing.cache.hit_rate(),
+             "ticks_over_budget": pathing.ticks_over_budget,
+             "fields_built": pathing.fields_built, "fields_dropped": pathing.fields_dropped}
+    lod = dict(zip(("full", "coarse", "dormant"), game.lod_counts))
+
+    # allocations in a separate, shorter pass: tracemalloc slows everything down
+    alloc_ticks = max(60, args.ticks // 5)
+    profiler.reset()
+    profiler.trace_alloc = True
+    tracemalloc.start()
+    run_ticks(game, script, warmup + args.ticks, alloc_ticks, draw)
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    profiler.trace_alloc = False
+
+    result = {
+        "config": {"ticks": args.ticks, "enemies": len(game.enemies), "seed": args.seed, "draw": draw,
+                   "map": f"{game.MAP_TILES_X}x{game.MAP_TILES_Y}", "workers": args.workers},
+        "state_digest": digest,
+        "ticks_per_sec": args.ticks / elapsed,
+        "ms_per_tick": elapsed / args.ticks * 1000,
+        "gc_collections": gc_runs,
+        "surfaces_created": surfaces,
+        "traced_peak_kib": peak_alloc / 1024,
+        "paths": paths,
+        "ai_lod": lod,
+        "subsystems": {},
+    }
+    for label, names in SUBSYSTEMS:
+        result["subsystems"][label.strip()] = {
+            "calls_per_tick": sum(calls[n] for n in names) / args.ticks,
+            "ms_per_tick": sum(timings[n] for n in names) / args.ticks * 1000,
+            "net_kib_per_tick": sum(profiler.alloc[n] for n in names) / alloc_ticks / 1024,
+        }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    game.pygame.quit()
+
+def change(now, before):
+    if not before:
+        return ""
+    return f"{(now - before) / before * 100:+7.1f}%"
+
+def print_report(result, baseline=None):
+    cfg = result["config"]
+    base_subs = baseline["subsystems"] if baseline else {}
+    print(f"{cfg['ticks']} ticks, {cfg['enemies']} enemies, seed {cfg['seed']}, map {cfg.get('map', '60x48')}, "
+          f"{'sim + draw' if cfg['draw'] else 'sim only'}"
+          f"{', %d AI workers' % cfg['workers'] if cfg.get('workers') else ''}")
+    digest = result["state_digest"]
+    if baseline and baseline["state_digest"] != digest:
+        digest += f"  (baseline {baseline['state_digest']}: simulation behaviour changed)"
+    print(f"  state digest   {digest}")
+    print(f"  ticks/sec      {result['ticks_per_sec']:10.1f}  "
+          f"{change(result['ticks_per_sec'], baseline and baseline['ticks_per_sec'])}")
+    print(f"  ms/tick        {result['ms_per_tick']:10.3f}  "
+          f"{change(result['ms_per_tick'], baseline and baseline['ms_per_tick'])}")
+    print(f"{'subsystem':<18}{'calls/tick':>11}{'ms/tick':>10}{'net KiB/tick':>14}")
+    for label, _ in SUBSYSTEMS:
+        sub = result["subsystems"][label.strip()]
+        base = base_subs.get(label.strip())
+        print(f"{label:<18}{sub['calls_per_tick']:>11.1f}{sub['ms_per_tick']:>10.3f}"
+              f"{sub['net_kib_per_tick']:>14.2f}  {change(sub['ms_per_tick'], base and base['ms_per_tick'])}")
+    created = ", ".join(f"{k} {v}" for k, v in result["surfaces_created"].items())
+    print(f"gc collections {result['gc_collections']}, traced peak {result['traced_peak_kib']:.0f} KiB")
+    print(f"surfaces created: {created}")
+    paths = result.get("paths")
+    if paths:
+        print(f"paths: {paths['served']} served, {paths['searches']} searches "
+              f"({paths['searches_per_sec']:.1f}/s), {paths.get('rejected', 0)} unreachable, "
+              f"cache hit rate {paths['cache_hit_rate'] * 100:.1f}%, "
+              f"{paths['ticks_over_budget']} ticks over budget")
+        if "fields_built" in paths:
+            print(f"flow fields: {paths['fields_built']} built, {paths['fields_dropped']} restarted before finishing")
+    lod = result.get("ai_lod")
+    if lod:
+        print(f"AI tiers at end: {lod['full']} full, {lod['coarse']} coarse, {lod['dormant']} dormant")
+
+if __name__ == "__main__":
+    main()
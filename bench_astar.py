@@ -0,0 +1,106 @@
+# A* micro-benchmark: the flat-array search (plain and jump point) against
+# the tuple/dict A* it replaced, on seeded generated maps (noise, rooms and
+# the game's own mapgen layout). The reference is the old pathfinding module
+# itself, read from git history (--baseline-rev). Checks that every query
+# gives a valid path of the same length as the old search; the tiles can
+# differ where several shortest routes exist, since the new heap breaks f ties
+# towards the goal instead of by lowest x (see pathfinding.AStarSearch).
+#
+#   python bench_astar.py [--size 128] [--queries 200] [--seed 1] [--baseline-rev REV]
+
+import os, sys, time, types, argparse, subprocess
+import numpy as np
+import grid, pathfinding, mapgen
+
+# the last commit with the tuple/dict A*, before the flat-array rewrite
+BASELINE_REV = "f7cb515^"
+
+def baseline_module(rev):
+    # pathfinding.py as committed at rev, loaded next to the current one
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        src = subprocess.run(["git", "show", f"{rev}:pathfinding.py"], cwd=here,
+                             capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError) as ex:
+        sys.exit(f"can't read pathfinding.py at {rev} from git: {ex}")
+    module = types.ModuleType("pathfinding_baseline")
+    exec(compile(src, f"{rev}:pathfinding.py", "exec"), module.__dict__)
+    return module
+
+def noise_map(size, density, rng):
+    g = grid.Grid(size, size, fill=grid.FLOOR)
+    g.cells()[:] = np.where(rng.random((size, size)) < density, grid.WALL_CODE, grid.FLOOR_CODE)
+    g.rebuild_masks()
+    return g
+
+def rooms_map(size, rng):
+    # rooms on a coarse lattice joined by 1-3 wide corridors
+    g = grid.Grid(size, size)
+    cells = g.cells()
+    cell = 16
+    centers = []
+    for cy in range(cell // 2, size - cell // 2, cell):
+        for cx in range(cell // 2, size - cell // 2, cell):
+            rw, rh = rng.integers(3, cell // 2, size=2)
+            cells[cy - rh // 2:cy + rh // 2 + 1, cx - rw // 2:cx + rw // 2 + 1] = grid.FLOOR_CODE
+            centers.append((cx, cy))
+    for cx, cy in centers:
+        for nx, ny in ((cx + cell, cy), (cx, cy + cell)):
+            if (nx, ny) in centers and rng.random() < 0.8:
+                half = int(rng.integers(0, 2))
+                cells[min(cy, ny) - half:max(cy, ny) + half + 1, min(cx, nx) - half:max(cx, nx) + half + 1] = grid.FLOOR_CODE
+    g.rebuild_masks()
+    return g
+
+def valid(g, path, start, goal):
+    if not path:
+        return True
+    if path[0] != start or path[-1] != goal:
+        return False
+    return all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 and g.walkable(*b) for a, b in zip(path, path[1:]))
+
+def run(name, g, queries, rng, legacy):
+    floor = np.flatnonzero(np.frombuffer(g.solid, dtype=np.uint8) == 0)
+    pairs = [tuple(g.tile_at(int(i)) for i in rng.choice(floor, 2)) for _ in range(queries)]
+    results = {}
+    searches = (("legacy", lambda a, b: legacy.AStarSearch(g, a, b)),
+                ("astar", lambda a, b: pathfinding.AStarSearch(g, a, b)),
+                ("jps", lambda a, b: pathfinding.AStarSearch(g, a, b, jps=True)))
+    for label, make in searches:
+        paths = []
+        expanded = 0
+        t = time.perf_counter()
+        for start, goal in pairs:
+            s = make(start, goal)
+            s.step(1 << 30)
+            paths.append(s.path)
+            expanded += s.expanded
+        results[label] = (time.perf_counter() - t, expanded, paths)
+    ref = results["legacy"][2]
+    print(f"{name} ({g.w}x{g.h}, {queries} queries)")
+    print(f"  {'search':<8}{'ms/query':>10}{'speedup':>9}{'expanded':>10}{'same len':>10}{'same path':>11}")
+    base = results["legacy"][0]
+    for label, (elapsed, expanded, paths) in results.items():
+        same_len = sum(len(a) == len(b) and valid(g, a, *pair) for a, b, pair in zip(paths, ref, pairs))
+        same = sum(a == b for a, b in zip(paths, ref))
+        print(f"  {label:<8}{elapsed / queries * 1000:>10.3f}{base / elapsed:>8.1f}x"
+              f"{expanded / queries:>10.0f}{same_len:>10}{same:>11}")
+        if same_len != queries:
+            sys.exit(f"{label}: {queries - same_len} paths differ in length from the reference")
+
+def main():
+    parser = argparse.ArgumentParser(description="A* benchmark on generated maps")
+    parser.add_argument("--size", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline-rev", default=BASELINE_REV, help="git revision of the reference A*")
+    args = parser.parse_args()
+    legacy = baseline_module(args.baseline_rev)
+    rng = np.random.default_rng(args.seed)
+    run("open", noise_map(args.size, 0.05, rng), args.queries, rng, legacy)
+    run("cluttered", noise_map(args.size, 0.25, rng), args.queries, rng, legacy)
+    run("rooms", rooms_map(args.size, rng), args.queries, rng, legacy)
+    run("game", mapgen.generate(args.size, args.size, seed=args.seed)[0], args.queries, rng, legacy)
+
+if __name__ == "__main__":
+    main()
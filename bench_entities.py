@@ -0,0 +1,140 @@
+# Micro-benchmark for the entity representations: per-entity memory of the
+# slotted classes against the dicts they replaced, and per-tick time of the
+# real update code with N enemies. For before / after tick times, run it on
+# both checkouts. Runs headless:  python bench_entities.py [enemies] [ticks]
+
+import os, sys, copy, time, tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import main
+import enemy_pool
+
+def fields_of(obj):
+    return {name: getattr(obj, name) for name in type(obj).__slots__}
+
+def bytes_per(make, count=2000):
+    # allocation per object; field values are shared, so this is the container cost
+    keep = []
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(count):
+        keep.append(make())
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+class PlainNPC:
+    # how NPC looked before __slots__
+    pass
+
+def plain_npc(npc):
+    obj = PlainNPC()
+    for name, value in fields_of(npc).items():
+        setattr(obj, name, value)
+    return obj
+
+def enemy_pool_bytes():
+    # an enemy's fields live in the pool's columns (the SoA pool), not in its view
+    pool = main.enemies
+    per_slot = sum(getattr(pool, name).itemsize for name in enemy_pool.COLUMNS)
+    per_slot += sum(getattr(pool, name).itemsize for name in ("synced_x", "synced_y", "synced_radius"))
+    # + its list slots in pool.views / pool.paths
+    return per_slot + 2 * 8
+
+def report_memory():
+    npc = main.NPCS[0]
+    spark = main.Spark(0.0, 0.0, 18, 8)
+    player_fields = fields_of(main.player)
+    spark_fields = fields_of(spark)
+    enemy_spec = main.create_enemy(0.0, 0.0)
+    rows = [
+        ("player", bytes_per(lambda: dict(player_fields)), bytes_per(lambda: copy.copy(main.player))),
+        ("spark", bytes_per(lambda: dict(spark_fields)), bytes_per(lambda: copy.copy(spark))),
+        ("npc", bytes_per(lambda: plain_npc(npc)), bytes_per(lambda: copy.copy(npc))),
+        ("enemy", bytes_per(lambda: dict(enemy_spec)), sys.getsizeof(main.enemies[0])),
+    ]
+    print("per-entity memory (bytes)      dict / __dict__     slotted")
+    for name, old, new in rows:
+        print(f"  {name:<8}{old:>32.0f}{new:>12.0f}")
+    print(f"  (the slotted enemy is a view; its fields take {enemy_pool_bytes():.0f} bytes of pool columns)")
+
+def player_timers_dict(p):
+    if p["attack_cooldown"] > 0: p["attack_cooldown"] -= 1
+    if p["swipe_timer"] > 0: p["swipe_timer"] -= 1
+    if p["dodge_timer"] > 0: p["dodge_timer"] -= 1
+    if p["dodge_cooldown"] > 0: p["dodge_cooldown"] -= 1
+    if p["invincible"] > 0: p["invincible"] -= 1
+
+def player_timers_slots(p):
+    if p.attack_cooldown > 0: p.attack_cooldown -= 1
+    if p.swipe_timer > 0: p.swipe_timer -= 1
+    if p.dodge_timer > 0: p.dodge_timer -= 1
+    if p.dodge_cooldown > 0: p.dodge_cooldown -= 1
+    if p.invincible > 0: p.invincible -= 1
+
+def per_call_us(fn, arg, count=200000):
+    t = time.perf_counter()
+    for _ in range(count):
+        fn(arg)
+    return (time.perf_counter() - t) / count * 1e6
+
+def report_field_access():
+    as_dict = fields_of(main.player)
+    as_dict["attack_cooldown"] = as_dict["swipe_timer"] = 10 ** 9
+    slotted = copy.copy(main.player)
+    slotted.attack_cooldown = slotted.swipe_timer = 10 ** 9
+    print("player timer block (us/call)   dict                slotted")
+    print(f"  {'':<8}{per_call_us(player_timers_dict, as_dict):>32.3f}"
+          f"{per_call_us(player_timers_slots, slotted):>12.3f}")
+
+class NoKeys:
+    def __getitem__(self, key):
+        return False
+
+def spawn_positions(enemy_count):
+    main.random.seed(1)
+    return [main.random_spawn_point() for _ in range(enemy_count)]
+
+def report_ticks(enemy_count, ticks):
+    positions = spawn_positions(enemy_count)
+    main.enemies.clear()
+    for x, y in positions:
+        main.enemies.append(main.create_enemy(x, y))
+    main.reindex_enemies()
+    main.random.seed(2)
+    keys = NoKeys()
+    timings = {"handle_player_movement": 0.0, "update_enemy_ai": 0.0, "perform_attack": 0.0}
+    center = (main.WIDTH // 2, main.HEIGHT // 2)
+    for tick in range(ticks):
+        t0 = time.perf_counter()
+        main.handle_player_movement(keys)
+        t1 = time.perf_counter()
+        main.update_lod()
+        main.request_stale_paths()
+        main.update_enemy_ai()
+        main.service_path_requests()
+        main.tick_respawns()
+        main.sync_enemy_index()
+        t2 = time.perf_counter()
+        main.player.attack_cooldown = 0
+        main.perform_attack(center)
+        t3 = time.perf_counter()
+        player_timers_slots(main.player)
+        main.player.hp = 100
+        timings["handle_player_movement"] += t1 - t0
+        timings["update_enemy_ai"] += t2 - t1
+        timings["perform_attack"] += t3 - t2
+    print(f"per-tick update time, {enemy_count} enemies, {ticks} ticks (ms/tick)")
+    for name, total in timings.items():
+        print(f"  {name:<28}{total / ticks * 1000:>8.3f}")
+
+if __name__ == "__main__":
+    enemy_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    report_memory()
+    report_field_access()
+    report_ticks(enemy_count, ticks)
+    pygame.quit()
@@ -0,0 +1,243 @@
+# Streamed world: the map is cut into CHUNK x CHUNK tile chunks that are
+# generated (mapgen.generate_region) or read back from disk on demand, and
+# only a window of (2 * radius + 1)^2 chunks around the player is loaded into
+# a regular grid.Grid. Collision, pathfinding, connectivity etc. keep working
+# on that grid unchanged, in window-local tile coordinates; ChunkWorld
+# translates between those and world tiles / pixels. Everything outside the
+# window counts as wall. A map small enough to fit in the window (the default
+# level) is made whole by mapgen.generate() instead, keeps its MapInfo in
+# .info, and never streams or touches the store.
+#
+# Chunks persist in WORLD_DIR as one file per map: a chunk-major uint8 tile
+# array (chunk k is bytes [k*C*C, (k+1)*C*C)) memory-mapped and grown
+# sparsely, plus a one-byte-per-chunk "generated" index. Tile edits (set(), or
+# writes to the loaded grid's rows) are written through, so they survive the
+# chunk being unloaded. If the files can't be mapped the store falls back to
+# keeping chunks in memory.
+
+import os
+import numpy as np
+import grid, mapgen, collision
+
+WORLD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".world")
+CHUNK = 64
+# stored maps to keep; older ones are deleted when a new one is created
+MAX_STORED_MAPS = 4
+# tiles the player may stray past the centre chunk before the window moves
+HYSTERESIS = 8
+
+class ChunkStore:
+    def __init__(self, width, height, seed, chunk=CHUNK, directory=WORLD_DIR):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.chunk = chunk
+        self.chunks_x = (width + chunk - 1) // chunk
+        self.chunks_y = (height + chunk - 1) // chunk
+        self.generated = 0
+        self.loaded = 0
+        self.tiles = None
+        self.index = None
+        self.memory = {}
+        try:
+            self._open(directory)
+        except (OSError, ValueError) as ex:
+            print(f"Chunk store unavailable, keeping chunks in memory: {ex}")
+            self.tiles = None
+            self.index = None
+
+    def _open(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{self.seed}_{self.width}x{self.height}_{self.chunk}")
+        count = self.chunks_x * self.chunks_y
+        size = self.chunk * self.chunk
+        if not os.path.exists(base + ".idx"):
+            self._prune(directory)
+        for path, length in ((base + ".tiles", count * size), (base + ".idx", count)):
+            # truncate() makes a sparse file: untouched chunks take no disk space
+            with open(path, "ab") as f:
+                if f.tell() != length:
+                    f.truncate(length)
+        self.tiles = np.memmap(base + ".tiles", dtype=np.uint8, mode="r+", shape=(count, self.chunk, self.chunk))
+        self.index = np.memmap(base + ".idx", dtype=np.uint8, mode="r+", shape=(count,))
+
+    def _prune(self, directory):
+        maps = sorted((os.path.getmtime(os.path.join(directory, name)), name[:-4])
+                      for name in os.listdir(directory) if name.endswith(".idx"))
+        for _, stem in maps[:max(0, len(maps) - MAX_STORED_MAPS + 1)]:
+            for ext in (".idx", ".tiles"):
+                try:
+                    os.remove(os.path.join(directory, stem + ext))
+                except OSError:
+                    pass
+
+    def read(self, cx, cy):
+        # (chunk, chunk) tile codes; generated and stored the first time
+        k = cy * self.chunks_x + cx
+        if self.tiles is None:
+            block = self.memory.get(k)
+            if block is None:
+                block = self.memory[k] = self._generate(cx, cy)
+            return block
+        if not self.index[k]:
+            self.tiles[k] = self._generate(cx, cy)
+            self.index[k] = 1
+        else:
+            self.loaded += 1
+        return self.tiles[k]
+
+    def _generate(self, cx, cy):
+        self.generated += 1
+        c = self.chunk
+        return mapgen.generate_region(self.width, self.height, self.seed, cx * c, cy * c, c, c)
+
+    def write(self, tx, ty, code):
+        c = self.chunk
+        block = self.read(tx // c, ty // c)
+        block[ty % c, tx % c] = code
+
+    def flush(self):
+        if self.tiles is not None:
+            self.tiles.flush()
+            self.index.flush()
+
+class ChunkWorld:
+    def __init__(self, width, height, seed, tile_size, radius=1, chunk=CHUNK, directory=WORLD_DIR):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.chunk = chunk
+        self.radius = radius
+        span = (2 * radius + 1) * chunk
+        self.info = None
+        if width <= span and height <= span:
+            self.store = None
+            self.grid, self.info = mapgen.generate(width, height, seed)
+        else:
+            self.store = ChunkStore(width, height, seed, chunk, directory)
+            # the loaded window, never bigger than the map
+            self.grid = grid.Grid(min(span, width), min(span, height))
+        self.ox = 0
+        self.oy = 0
+        self.center = None
+        self.recenters = 0
+        # fn(tx, ty) in world tiles after a tile edit; fn(None, None) when the
+        # window moves (or the loaded grid is rebuilt)
+        self.listeners = []
+        self.grid.listeners.append(self._grid_changed)
+
+    # --- streaming ---
+    def follow(self, tx, ty):
+        # keep the window around world tile (tx, ty); True if it moved
+        c = self.chunk
+        if self.store is None:
+            # the whole map is loaded; just record the first centre
+            if self.center is None:
+                self.center = (tx // c, ty // c)
+                self.recenters += 1
+                return True
+            return False
+        if self.center is not None:
+            ccx, ccy = self.center
+            if (ccx * c - HYSTERESIS <= tx < (ccx + 1) * c + HYSTERESIS and
+                    ccy * c - HYSTERESIS <= ty < (ccy + 1) * c + HYSTERESIS):
+                return False
+        cx = min(max(tx, 0), self.width - 1) // c
+        cy = min(max(ty, 0), self.height - 1) // c
+        if (cx, cy) == self.center:
+            return False
+        self.recenter(cx, cy)
+        return True
+
+    def recenter(self, cx, cy):
+        c = self.chunk
+        g = self.grid
+        # window origin, kept inside the map so small maps load exactly once
+        ox = min(max(0, (cx - self.radius) * c), self.width - g.w)
+        oy = min(max(0, (cy - self.radius) * c), self.height - g.h)
+        cells = g.cells()
+        cells[:] = grid.WALL_CODE
+        for ky in range(oy // c, (oy + g.h - 1) // c + 1):
+            for kx in range(ox // c, (ox + g.w - 1) // c + 1):
+                block = self.store.read(kx, ky)
+                x0, y0 = kx * c, ky * c
+                ax, ay = max(x0, ox), max(y0, oy)
+                bx, by = min(x0 + c, ox + g.w, self.width), min(y0 + c, oy + g.h, self.height)
+                cells[ay - oy:by - oy, ax - ox:bx - ox] = block[ay - y0:by - y0, ax - x0:bx - x0]
+        self.ox = ox
+        self.oy = oy
+        self.center = (cx, cy)
+        self.recenters += 1
+        g.rebuild_masks()
+
+    def flush(self):
+        if self.store is not None:
+            self.store.flush()
+
+    def loaded_chunks(self):
+        c = self.chunk
+        return [(kx, ky) for ky in range(self.oy // c, (self.oy + self.grid.h - 1) // c + 1)
+                for kx in range(self.ox // c, (self.ox + self.grid.w - 1) // c + 1)]
+
+    # --- coordinates ---
+    def to_local(self, tile):
+        return tile[0] - self.ox, tile[1] - self.oy
+
+    def to_world(self, tile):
+        return tile[0] + self.ox, tile[1] + self.oy
+
+    def contains_px(self, xs, ys):
+        # bool array: which world-pixel positions lie in the loaded window
+        ts = self.tile_size
+        lx = np.floor_divide(xs, ts) - self.ox
+        ly = np.floor_divide(ys, ts) - self.oy
+        return (lx >= 0) & (lx < self.grid.w) & (ly >= 0) & (ly < self.grid.h)
+
+    # --- tiles (world coordinates) ---
+    def is_wall(self, tx, ty):
+        return self.grid.is_wall(tx - self.ox, ty - self.oy)
+
+    def solid_block(self, x0, y0, x1, y1):
+        # (y1-y0, x1-x0) solid flags for world tiles [x0, x1) x [y0, y1); unloaded = 1
+        g = self.grid
+        out = np.ones((y1 - y0, x1 - x0), dtype=np.uint8)
+        solid = np.frombuffer(g.solid, dtype=np.uint8).reshape(g.h, g.w)
+        ax, ay = max(x0, self.ox), max(y0, self.oy)
+        bx, by = min(x1, self.ox + g.w), min(y1, self.oy + g.h)
+        if ax < bx and ay < by:
+            out[ay - y0:by - y0, ax - x0:bx - x0] = solid[ay - self.oy:by - self.oy, ax - self.ox:bx - self.ox]
+        return out
+
+    def set(self, tx, ty, ch):
+        if not (0 <= tx < self.width and 0 <= ty < self.height):
+            return
+        lx, ly = tx - self.ox, ty - self.oy
+        if self.grid.in_bounds(lx, ly):
+            # _grid_changed writes it through and tells the listeners
+            self.grid.set(lx, ly, ch)
+            return
+        if self.store is not None:
+            self.store.write(tx, ty, ord(ch))
+        for fn in self.listeners:
+            fn(tx, ty)
+
+    def _grid_changed(self, lx, ly):
+        # every edit of the loaded grid, through set() or the grid[y][x] rows
+        if lx is None:
+            tx = ty = None
+        else:
+            tx, ty = lx + self.ox, ly + self.oy
+            if self.store is not None:
+                self.store.write(tx, ty, self.grid.tiles[ly * self.grid.w + lx])
+        for fn in self.listeners:
+            fn(tx, ty)
+
+    # --- collision (world pixels) ---
+    def can_move(self, x, y, radius):
+        ts = self.tile_size
+        return collision.can_move(self.grid, ts, x - self.ox * ts, y - self.oy * ts, radius)
+
+    def can_move_many(self, xs, ys, radii):
+        ts = self.tile_size
+        return collision.can_move_many(self.grid, ts, np.asarray(xs) - self.ox * ts,
+                                       np.asarray(ys) - self.oy * ts, radii)
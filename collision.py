@@ -0,0 +1,67 @@
+# Circle-vs-tile collision against a grid's solid bitmap. No Rects or other
+# objects are built per query: just tile index math and a closest-point test.
+
+import numpy as np
+
+def can_move(grid, tile_size, x, y, radius):
+    left = int((x - radius) // tile_size)
+    right = int((x + radius) // tile_size)
+    top = int((y - radius) // tile_size)
+    bottom = int((y + radius) // tile_size)
+    w = grid.w
+    if top < 0 or left < 0 or bottom >= grid.h or right >= w:
+        return False
+    solid = grid.solid
+    r2 = radius * radius
+    for ty in range(top, bottom + 1):
+        row = ty * w
+        y0 = ty * tile_size
+        # vertical distance from the circle centre to this tile row
+        if y < y0:
+            dy = y0 - y
+        elif y > y0 + tile_size:
+            dy = y - y0 - tile_size
+        else:
+            dy = 0
+        dy2 = dy * dy
+        for tx in range(left, right + 1):
+            if solid[row + tx]:
+                x0 = tx * tile_size
+                if x < x0:
+                    dx = x0 - x
+                elif x > x0 + tile_size:
+                    dx = x - x0 - tile_size
+                else:
+                    dx = 0
+                if dx * dx + dy2 < r2:
+                    return False
+    return True
+
+def can_move_many(grid, tile_size, xs, ys, radii):
+    # batched can_move: returns a bool array, one entry per candidate position
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), xs.shape)
+    if xs.size == 0:
+        return np.zeros(0, dtype=bool)
+    left = np.floor((xs - radii) / tile_size).astype(np.int64)
+    right = np.floor((xs + radii) / tile_size).astype(np.int64)
+    top = np.floor((ys - radii) / tile_size).astype(np.int64)
+    bottom = np.floor((ys + radii) / tile_size).astype(np.int64)
+    ok = (left >= 0) & (top >= 0) & (right < grid.w) & (bottom < grid.h)
+    solid = np.frombuffer(grid.solid, dtype=np.uint8).reshape(grid.h, grid.w)
+    r2 = radii * radii
+    span = int(max((right - left).max(), (bottom - top).max())) + 1
+    for oy in range(span):
+        ty = top + oy
+        tyc = np.clip(ty, 0, grid.h - 1)
+        y0 = tyc * tile_size
+        dy = np.clip(ys, y0, y0 + tile_size) - ys
+        for ox in range(span):
+            tx = left + ox
+            txc = np.clip(tx, 0, grid.w - 1)
+            x0 = txc * tile_size
+            dx = np.clip(xs, x0, x0 + tile_size) - xs
+            hit = (tx <= right) & (ty <= bottom) & (solid[tyc, txc] != 0) & (dx * dx + dy * dy < r2)
+            ok &= ~hit
+    return ok
@@ -0,0 +1,86 @@
+# Connected components of the walkable tiles (4-connected, the same moves the
+# pathfinder makes) and a per-component tile index, so "is B reachable from
+# A" is two array reads and "random walkable tile reachable from here" is one
+# random draw. Labels are rebuilt lazily after the grid changes.
+#
+# Labelling works on horizontal runs of floor: runs are numbered with a
+# cumsum, runs touching vertically are unioned with vectorised union-find
+# (hook the larger root under the smaller, pointer-jump, repeat), then the
+# roots are renumbered 0..count-1.
+
+import random
+import numpy as np
+
+class Components:
+    def __init__(self, grid):
+        self.grid = grid
+        self.version = None
+        self.labels = None   # flat (h*w,) int32, -1 on walls
+        self.count = 0
+        self.sizes = None    # tiles per component
+        self.tiles = None    # flat tile ids grouped by component
+        self.starts = None   # component k's tiles are tiles[starts[k]:starts[k] + sizes[k]]
+        self.refresh()
+
+    def refresh(self):
+        grid = self.grid
+        if self.version == grid.version:
+            return
+        self.version = grid.version
+        walk = np.frombuffer(grid.solid, dtype=np.uint8).reshape(grid.h, grid.w) == 0
+        run_start = walk.copy()
+        run_start[:, 1:] &= ~walk[:, :-1]
+        run_id = np.cumsum(run_start.ravel()).reshape(grid.h, grid.w) - 1
+        runs = int(run_start.sum())
+        # runs joined through a vertical step
+        down = walk[:-1] & walk[1:]
+        a = run_id[:-1][down]
+        b = run_id[1:][down]
+        parent = np.arange(runs, dtype=np.int64)
+        while len(a):
+            while True:
+                hop = parent[parent]
+                if np.array_equal(hop, parent):
+                    break
+                parent = hop
+            ra = parent[a]
+            rb = parent[b]
+            split = ra != rb
+            if not split.any():
+                break
+            a = a[split]
+            b = b[split]
+            ra = ra[split]
+            rb = rb[split]
+            np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        roots, run_label = np.unique(parent, return_inverse=True)
+        labels = np.full(grid.w * grid.h, -1, dtype=np.int32)
+        flat_walk = walk.ravel()
+        labels[flat_walk] = run_label[run_id.ravel()[flat_walk]]
+        self.labels = labels
+        self.count = len(roots)
+        self.sizes = np.bincount(labels[flat_walk], minlength=self.count)
+        self.tiles = np.flatnonzero(flat_walk)[np.argsort(labels[flat_walk], kind="stable")]
+        self.starts = np.concatenate(([0], np.cumsum(self.sizes)[:-1]))
+
+    def label(self, tile):
+        # component of a tile, -1 for walls and out of bounds
+        self.refresh()
+        x, y = tile
+        if 0 <= x < self.grid.w and 0 <= y < self.grid.h:
+            return int(self.labels[y * self.grid.w + x])
+        return -1
+
+    def connected(self, a, b):
+        la = self.label(a)
+        return la >= 0 and la == self.label(b)
+
+    def largest(self):
+        self.refresh()
+        return int(self.sizes.argmax()) if self.count else -1
+
+    def random_tile(self, component, rng=random):
+        # uniformly random tile of a component; rng is anything with randrange
+        self.refresh()
+        i = int(self.tiles[self.starts[component] + rng.randrange(int(self.sizes[component]))])
+        return i % self.grid.w, i // self.grid.w
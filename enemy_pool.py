@@ -0,0 +1,187 @@
+# Structure-of-arrays enemy storage. Every per-enemy field lives in a NumPy
+# column so the AI can update the whole population in a few vectorized steps;
+# EnemyView wraps one slot as an object (e.hp -= 28) so per-enemy code stays
+# readable.
+
+import numpy as np
+
+STATES = ("idle", "telegraph", "attack", "cooldown")
+IDLE, TELEGRAPH, ATTACK, COOLDOWN = range(len(STATES))
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+
+# column name -> dtype: the numeric create_enemy() fields, plus path_len which
+# mirrors len(path) so path checks can be vectorized
+COLUMNS = {
+    "x": np.float64,
+    "y": np.float64,
+    # position at the start of the current sim tick, for render interpolation
+    "prev_x": np.float64,
+    "prev_y": np.float64,
+    "radius": np.int64,
+    "hp": np.int64,
+    "speed": np.float64,
+    "dead": np.bool_,
+    "fade": np.int64,
+    "sink": np.float64,
+    "death_timer": np.int64,
+    "respawn_timer": np.int64,
+    "path_index": np.int64,
+    "path_len": np.int64,
+    "pf_cooldown": np.int64,
+    "pf_request": np.bool_,
+    # queued with the path scheduler, result not back yet
+    "pf_pending": np.bool_,
+    "state": np.int8,
+    "state_timer": np.int64,
+    "attack_cooldown": np.int64,
+    "telegraph_len": np.int64,
+    "attack_len": np.int64,
+    "cooldown_len": np.int64,
+    "anim_index": np.int64,
+    "anim_timer": np.float64,
+    "anim_frame_rate": np.float64,
+    # player tile the current path was computed for; -1 = no path yet
+    "last_tile_x": np.int64,
+    "last_tile_y": np.int64,
+    # AI level of detail from the last AI pass (LOD_FULL / LOD_COARSE / LOD_DORMANT)
+    "lod": np.int8,
+    # this tick's move order (MOVE_*) and its argument, carried out by
+    # ai_workers.move: wander offset or waypoint, in world pixels
+    "move_order": np.int8,
+    "move_x": np.float64,
+    "move_y": np.float64,
+}
+
+LOD_FULL, LOD_COARSE, LOD_DORMANT = range(3)
+MOVE_NONE, MOVE_WANDER, MOVE_WAYPOINT, MOVE_DIRECT = range(4)
+
+class EnemyView:
+    # One enemy as a slotted object; field attributes read and write the pool's
+    # columns (see the properties attached below the class).
+    __slots__ = ("pool", "i")
+
+    def __init__(self, pool, i):
+        self.pool = pool
+        self.i = i
+
+    @property
+    def state(self):
+        return STATES[self.pool.state[self.i]]
+
+    @state.setter
+    def state(self, name):
+        self.pool.state[self.i] = STATE_CODES[name]
+
+    @property
+    def path(self):
+        return self.pool.paths[self.i]
+
+    @path.setter
+    def path(self, path):
+        self.pool.paths[self.i] = path
+        self.pool.path_len[self.i] = len(path)
+
+    @property
+    def last_player_tile(self):
+        pool, i = self.pool, self.i
+        if pool.last_tile_x[i] < 0:
+            return None
+        return (pool.last_tile_x.item(i), pool.last_tile_y.item(i))
+
+    @last_player_tile.setter
+    def last_player_tile(self, tile):
+        pool, i = self.pool, self.i
+        if tile is None:
+            pool.last_tile_x[i] = pool.last_tile_y[i] = -1
+        else:
+            pool.last_tile_x[i], pool.last_tile_y[i] = tile
+
+    def update(self, fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    def __repr__(self):
+        return f"<enemy {self.i} at ({self.pool.x[self.i]:.0f}, {self.pool.y[self.i]:.0f})>"
+
+def _column_property(name):
+    def fget(view):
+        return getattr(view.pool, name).item(view.i)
+    def fset(view, value):
+        getattr(view.pool, name)[view.i] = value
+    return property(fget, fset)
+
+for _name in COLUMNS:
+    if _name != "state":
+        setattr(EnemyView, _name, _column_property(_name))
+
+class EnemyPool:
+    def __init__(self, specs=(), capacity=16):
+        self.n = 0
+        self.capacity = 0
+        self.paths = []
+        self.views = []
+        self._grow(capacity)
+        for spec in specs:
+            self.append(spec)
+
+    def _grow(self, capacity):
+        for name, dtype in COLUMNS.items():
+            col = np.zeros(capacity, dtype=dtype)
+            if self.capacity:
+                col[:self.n] = getattr(self, name)[:self.n]
+            setattr(self, name, col)
+        # positions as of the last take_moved() call (spatial index sync)
+        for name in ("synced_x", "synced_y", "synced_radius"):
+            col = np.full(capacity, np.nan)
+            if self.capacity:
+                col[:self.n] = getattr(self, name)[:self.n]
+            setattr(self, name, col)
+        self.capacity = capacity
+
+    # --- list-like API (enemies used to be a list of dicts) ---
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return iter(self.views[:self.n])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError("enemy index out of range")
+        return self.views[i]
+
+    def append(self, spec):
+        if self.n == self.capacity:
+            self._grow(self.capacity * 2)
+        i = self.n
+        self.n += 1
+        if i == len(self.views):
+            self.views.append(EnemyView(self, i))
+            self.paths.append([])
+        for name in COLUMNS:
+            getattr(self, name)[i] = 0
+        self.last_tile_x[i] = self.last_tile_y[i] = -1
+        self.synced_x[i] = self.synced_y[i] = self.synced_radius[i] = np.nan
+        self.paths[i] = []
+        view = self.views[i]
+        view.update(spec)
+        if "prev_x" not in spec:
+            self.prev_x[i] = self.x[i]
+            self.prev_y[i] = self.y[i]
+        return view
+
+    def clear(self):
+        self.n = 0
+
+    def take_moved(self):
+        # slots whose position / radius changed since the previous call
+        n = self.n
+        moved = np.flatnonzero((self.x[:n] != self.synced_x[:n]) |
+                               (self.y[:n] != self.synced_y[:n]) |
+                               (self.radius[:n] != self.synced_radius[:n]))
+        self.synced_x[:n] = self.x[:n]
+        self.synced_y[:n] = self.y[:n]
+        self.synced_radius[:n] = self.radius[:n]
+        return moved
@@ -0,0 +1,143 @@
+# Compact tile grid: one byte per tile in a flat bytearray, plus precomputed
+# walkability and neighbour masks. grid[y][x] still reads / writes "W" and "."
+# so older code keeps working, but hot paths should use the flat arrays.
+
+import numpy as np
+
+WALL = "W"
+FLOOR = "."
+WALL_CODE = ord(WALL)
+FLOOR_CODE = ord(FLOOR)
+
+# bit k of a neighbour mask is set when the tile one STEPS[k] away is walkable
+STEPS = ((1,0),(-1,0),(0,1),(0,-1))
+
+class GridRow:
+    __slots__ = ("grid", "start")
+
+    def __init__(self, grid, y):
+        self.grid = grid
+        self.start = y * grid.w
+
+    def __len__(self):
+        return self.grid.w
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.grid.w
+        if not 0 <= x < self.grid.w:
+            raise IndexError("grid column out of range")
+        return chr(self.grid.tiles[self.start + x])
+
+    def __setitem__(self, x, ch):
+        if x < 0:
+            x += self.grid.w
+        self.grid.set(x, self.start // self.grid.w, ch)
+
+    def __iter__(self):
+        return iter(self.grid.tiles[self.start:self.start + self.grid.w].decode("ascii"))
+
+class Grid:
+    def __init__(self, w, h, fill=WALL):
+        self.w = w
+        self.h = h
+        self.tiles = bytearray([ord(fill)]) * (w * h)
+        self.solid = bytearray(w * h)
+        self.nbr = bytearray(w * h)
+        # flat-index offset for each STEPS direction
+        self.offsets = (1, -1, w, -w)
+        self.version = 0
+        self.listeners = []
+        self.rebuild_masks()
+
+    @classmethod
+    def from_rows(cls, rows):
+        grid = cls(len(rows[0]), len(rows))
+        for y, row in enumerate(rows):
+            grid.tiles[y * grid.w:(y + 1) * grid.w] = "".join(row).encode("ascii")
+        grid.rebuild_masks()
+        return grid
+
+    # --- list-of-rows compatibility ---
+    def __len__(self):
+        return self.h
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.h
+        if not 0 <= y < self.h:
+            raise IndexError("grid row out of range")
+        return GridRow(self, y)
+
+    def __iter__(self):
+        for y in range(self.h):
+            yield GridRow(self, y)
+
+    # --- flat access ---
+    def index(self, x, y):
+        return y * self.w + x
+
+    def tile_at(self, i):
+        return i % self.w, i // self.w
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.w and 0 <= y < self.h
+
+    def is_wall(self, x, y):
+        # outside the map counts as wall
+        if 0 <= x < self.w and 0 <= y < self.h:
+            return self.solid[y * self.w + x] == 1
+        return True
+
+    def walkable(self, x, y):
+        return not self.is_wall(x, y)
+
+    def get(self, x, y):
+        return chr(self.tiles[y * self.w + x])
+
+    def set(self, x, y, ch):
+        i = y * self.w + x
+        code = ord(ch)
+        if self.tiles[i] == code:
+            return
+        self.tiles[i] = code
+        self.solid[i] = 1 if code == WALL_CODE else 0
+        for yy in range(max(0, y - 1), min(self.h, y + 2)):
+            for xx in range(max(0, x - 1), min(self.w, x + 2)):
+                self._update_mask(xx, yy)
+        self.version += 1
+        for fn in self.listeners:
+            fn(x, y)
+
+    def _update_mask(self, x, y):
+        mask = 0
+        for bit, (dx, dy) in enumerate(STEPS):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.w and 0 <= ny < self.h and not self.solid[ny * self.w + nx]:
+                mask |= 1 << bit
+        self.nbr[y * self.w + x] = mask
+
+    def cells(self):
+        # writable (h, w) uint8 view over the tile codes; call rebuild_masks() after bulk edits
+        return np.frombuffer(self.tiles, dtype=np.uint8).reshape(self.h, self.w)
+
+    def rebuild_masks(self):
+        t = self.cells()
+        solid = t == WALL_CODE
+        walk = (~solid).astype(np.uint8)
+        nbr = np.zeros((self.h, self.w), dtype=np.uint8)
+        nbr[:, :-1] |= walk[:, 1:]
+        nbr[:, 1:] |= walk[:, :-1] << 1
+        nbr[:-1, :] |= walk[1:, :] << 2
+        nbr[1:, :] |= walk[:-1, :] << 3
+        self.solid[:] = solid.astype(np.uint8).tobytes()
+        self.nbr[:] = nbr.tobytes()
+        self.version += 1
+        for fn in self.listeners:
+            fn(None, None)
+
+    def neighbor_indices(self, i):
+        mask = self.nbr[i]
+        for bit, off in enumerate(self.offsets):
+            if mask & (1 << bit):
+                yield i + off
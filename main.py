@@ -1,20 +1,64 @@
 # Full game file (merged): original game systems + NPC interaction (press E) with bottom dialogue box fade
 
-import pygame, sys, math, random, heapq, os
-from collections import deque
+import pygame, sys, math, random, os, atexit, time
+import numpy as np
+from collections import deque, OrderedDict
+from functools import partial
+import sprite_cache, asset_loader, surface_pool, path_scheduler, mapgen, chunks, connectivity, spatial, enemy_pool, ai_workers, profiler
+
+# NIGHTFALL_AI_WORKERS=k moves enemies in k extra processes (see ai_workers);
+# worth it with thousands of enemies and spare cores. They are forked here,
+# before pygame.init() and the asset loader thread, so no SDL state or other
+# threads are copied into them.
+AI_WORKERS = 0
+try:
+    AI_WORKERS = max(0, int(os.environ.get("NIGHTFALL_AI_WORKERS", "0")))
+except ValueError:
+    print(f"Bad NIGHTFALL_AI_WORKERS '{os.environ['NIGHTFALL_AI_WORKERS']}', using 0")
+ai_worker_pool = ai_workers.AIWorkers(AI_WORKERS) if AI_WORKERS else None
+if ai_worker_pool is not None:
+    atexit.register(ai_worker_pool.close)
 
 pygame.init()
 WIDTH, HEIGHT = 800, 600
 ZOOM = 1.5  # zoom factor used for rendering
 VIEW_W = int(WIDTH / ZOOM)
 VIEW_H = int(HEIGHT / ZOOM)
+# How the VIEW_W x VIEW_H world view reaches the window:
+#   "smooth"  - render at view size into a reused surface, smoothscale up (default)
+#   "nearest" - same, but nearest-neighbour scale (much cheaper, crisper pixels)
+#   "native"  - render straight into the window with assets pre-scaled by ZOOM
+SCALE_MODES = ("smooth", "nearest", "native")
+SCALE_MODE = os.environ.get("NIGHTFALL_SCALE_MODE", "smooth")
+if SCALE_MODE not in SCALE_MODES:
+    print(f"Unknown scale mode '{SCALE_MODE}', using 'smooth'")
+    SCALE_MODE = "smooth"
+RENDER_SCALE = ZOOM if SCALE_MODE == "native" else 1.0
 
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Scuffed Bloodborne - Phase 2 (Camera, A*, Enemy Attacks) - NPCs")
 clock = pygame.time.Clock()
-FONT = pygame.font.SysFont("monospace", 18)
+
+# ---------- Fonts & text cache ----------
+# SysFont lookups are slow, so each (name, size, bold) font is built once, and
+# rendered strings are kept in an LRU keyed by font + text + color.
+FONTS = {}
+
+def get_font(name, size, bold=False):
+    key = (name, size, bold)
+    f = FONTS.get(key)
+    if f is None:
+        f = FONTS[key] = pygame.font.SysFont(name, size, bold=bold)
+    return f
+
+text_cache = surface_pool.SpriteCache(capacity=256)
+
+def render_text(text, color, name="monospace", size=18, bold=False):
+    return text_cache.get((name, size, bold, text, color),
+                          lambda: get_font(name, size, bold).render(text, True, color))
+
+FONT = get_font("monospace", 18)
 # --- Hidden Message Easter Egg ---
-font = pygame.font.SysFont("consolas", 22)
 secret_text = (
     "We changed what game engine we used 3 times.\n"
 )
@@ -36,8 +80,24 @@ BTN_HOVER = (120, 30, 30)
 
 # ---------- Map settings ----------
 TILE_SIZE = 40
+# NIGHTFALL_MAP_SIZE="WxH" for bigger levels; the world streams in chunks
+# around the player, so size only costs disk for the chunks actually visited
 MAP_TILES_X = 60
 MAP_TILES_Y = 48
+try:
+    MAP_TILES_X, MAP_TILES_Y = (int(v) for v in os.environ.get("NIGHTFALL_MAP_SIZE", "60x48").lower().split("x"))
+    if MAP_TILES_X < mapgen.MIN_SIZE or MAP_TILES_Y < mapgen.MIN_SIZE:
+        raise ValueError
+except ValueError:
+    print(f"Bad NIGHTFALL_MAP_SIZE '{os.environ['NIGHTFALL_MAP_SIZE']}', using 60x48")
+    MAP_TILES_X, MAP_TILES_Y = 60, 48
+
+def to_px(v):
+    # world-space length -> pixels on the render target
+    return int(v * RENDER_SCALE)
+
+def render_size(size):
+    return (round(size[0] * RENDER_SCALE), round(size[1] * RENDER_SCALE))
 
 # ---------- Utility: asset loader with fallbacks ----------
 ASSET_BASES = [
@@ -58,25 +118,42 @@ def find_asset(rel_path):
         return rel_path
     return None
 
-def load_image(rel_path):
+def decode_image(rel_path):
+    # worker-safe: decodes to a plain RGBA surface, no display-format conversion
     p = find_asset(rel_path)
     if not p:
         return None
     try:
-        return pygame.image.load(p).convert_alpha()
+        img = pygame.image.load(p)
     except Exception as ex:
         print(f"Failed to load image '{p}': {ex}")
         return None
+    return pygame.image.frombytes(pygame.image.tobytes(img, "RGBA"), img.get_size(), "RGBA")
 
-def slice_sheet_to_frames(rel_path, frame_w=None, frame_h=None, scale=None):
-    p = find_asset(rel_path)
-    if not p:
-        return []
+# Alpha projection: split a sheet into opaque column spans and trim each span
+# to its opaque rows, all as array ops over the sheet's alpha channel.
+def alpha_spans(sheet):
+    sheet_h = sheet.get_height()
+    alpha = pygame.surfarray.pixels_alpha(sheet)
     try:
-        sheet = pygame.image.load(p).convert_alpha()
-    except Exception as ex:
-        print(f"Failed to load sheet '{p}': {ex}")
+        opaque = alpha != 0
+    finally:
+        del alpha  # releases the surface lock
+    cols_used = opaque.any(axis=1)
+    edges = np.diff(cols_used.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
         return []
+    # gaps between spans are fully transparent, so reducing from one span
+    # start to the next gives exactly that span's row occupancy
+    rows_used = np.logical_or.reduceat(opaque, starts, axis=0)
+    tops = rows_used.argmax(axis=1)
+    bottoms = sheet_h - 1 - rows_used[:, ::-1].argmax(axis=1)
+    return [(int(x0), int(t), int(x1 - x0), int(b - t + 1))
+            for x0, x1, t, b in zip(starts, ends, tops, bottoms)]
+
+def slice_sheet(sheet, frame_w=None, frame_h=None, scale=None):
     sheet_w, sheet_h = sheet.get_size()
 
     if frame_w and frame_h and sheet_w % frame_w == 0 and sheet_h % frame_h == 0:
@@ -92,85 +169,9 @@ def slice_sheet_to_frames(rel_path, frame_w=None, frame_h=None, scale=None):
                 frames.append(frame)
         return frames
 
-    alpha_arr = []
-    for x in range(sheet_w):
-        col_transparent = True
-        for y in range(sheet_h):
-            px = sheet.get_at((x, y))
-            if px.a != 0:
-                col_transparent = False
-                break
-        alpha_arr.append(col_transparent)
-
     frames = []
-    in_span = False
-    span_start = 0
-    for x, is_trans in enumerate(alpha_arr):
-        if not is_trans and not in_span:
-            in_span = True
-            span_start = x
-        elif is_trans and in_span:
-            span_end = x - 1
-            w = span_end - span_start + 1
-            rect = pygame.Rect(span_start, 0, w, sheet_h)
-            frame = sheet.subsurface(rect).copy()
-            top_trim = 0
-            bottom_trim = sheet_h - 1
-            for yy in range(sheet_h):
-                row_has_pixel = False
-                for xx in range(span_start, span_end+1):
-                    if sheet.get_at((xx, yy)).a != 0:
-                        row_has_pixel = True
-                        break
-                if row_has_pixel:
-                    top_trim = yy
-                    break
-            for yy in range(sheet_h-1, -1, -1):
-                row_has_pixel = False
-                for xx in range(span_start, span_end+1):
-                    if sheet.get_at((xx, yy)).a != 0:
-                        row_has_pixel = True
-                        break
-                if row_has_pixel:
-                    bottom_trim = yy
-                    break
-            trimmed_h = bottom_trim - top_trim + 1
-            if trimmed_h > 0:
-                rect2 = pygame.Rect(span_start, top_trim, w, trimmed_h)
-                frame = sheet.subsurface(rect2).copy()
-            if scale is not None:
-                frame = pygame.transform.smoothscale(frame, scale)
-            frames.append(frame)
-            in_span = False
-    if in_span:
-        span_end = sheet_w - 1
-        w = span_end - span_start + 1
-        rect = pygame.Rect(span_start, 0, w, sheet_h)
-        frame = sheet.subsurface(rect).copy()
-        top_trim = 0
-        bottom_trim = sheet_h - 1
-        for yy in range(sheet_h):
-            row_has_pixel = False
-            for xx in range(span_start, span_end+1):
-                if sheet.get_at((xx, yy)).a != 0:
-                    row_has_pixel = True
-                    break
-            if row_has_pixel:
-                top_trim = yy
-                break
-        for yy in range(sheet_h-1, -1, -1):
-            row_has_pixel = False
-            for xx in range(span_start, span_end+1):
-                if sheet.get_at((xx, yy)).a != 0:
-                    row_has_pixel = True
-                    break
-            if row_has_pixel:
-                bottom_trim = yy
-                break
-        trimmed_h = bottom_trim - top_trim + 1
-        if trimmed_h > 0:
-            rect2 = pygame.Rect(span_start, top_trim, w, trimmed_h)
-            frame = sheet.subsurface(rect2).copy()
+    for x, y, w, h in alpha_spans(sheet):
+        frame = sheet.subsurface(pygame.Rect(x, y, w, h)).copy()
         if scale is not None:
             frame = pygame.transform.smoothscale(frame, scale)
         frames.append(frame)
@@ -191,123 +192,200 @@ P_TILE_FLOOR   = os.path.join("_ENVIRONMENT", "tiling backgrounds", "_tiling bac
 P_TILE_WALL    = os.path.join("_ENVIRONMENT", "old building1.png")
 P_ATTACK_FX    = os.path.join("_VFX", "fireball.png")
 
+# ---------- Cached decoders (run on the asset loader thread) ----------
+# Final scaled frames are kept in an on-disk cache keyed by source path, mtime
+# and slice parameters; a miss falls back to decoding + slicing the PNG.
+# Everything here returns unconverted surfaces; convert_frames() runs on the
+# main thread once the loader hands the result back.
+def decode_scaled_image(rel_path, size):
+    p = find_asset(rel_path)
+    if not p:
+        return None
+    params = ("image", tuple(size))
+    hit = sprite_cache.load(p, params, convert=False)
+    if hit and hit["frames"]:
+        return hit["frames"][0]
+    img = decode_image(rel_path)
+    if not img:
+        return None
+    img = pygame.transform.smoothscale(img, size)
+    sprite_cache.store(p, params, [img])
+    return img
+
+def decode_sheet_frames(rel_path, frame_w=None, frame_h=None, scale=None):
+    # returns (frames, sheet_size); sheet_size is None when the sheet can't be read
+    p = find_asset(rel_path)
+    if not p:
+        return [], None
+    params = ("sheet", frame_w, frame_h, tuple(scale) if scale else None)
+    hit = sprite_cache.load(p, params, convert=False)
+    if hit and hit["frames"]:
+        return hit["frames"], tuple(hit["meta"]["sheet_size"])
+    sheet = decode_image(rel_path)
+    if not sheet:
+        return [], None
+    frames = slice_sheet(sheet, frame_w, frame_h, scale)
+    sprite_cache.store(p, params, frames, {"sheet_size": list(sheet.get_size())})
+    return frames, sheet.get_size()
+
+def convert_frames(frames):
+    return [f.convert_alpha() for f in frames]
+
 # ---------- Load non-animated assets ----------
-tile_floor_img = load_image(P_TILE_FLOOR)
-if tile_floor_img:
-    tile_floor_img = pygame.transform.smoothscale(tile_floor_img, (TILE_SIZE, TILE_SIZE))
-tile_wall_img = load_image(P_TILE_WALL)
-if tile_wall_img:
-    tile_wall_img = pygame.transform.smoothscale(tile_wall_img, (TILE_SIZE, TILE_SIZE))
-slash_fx_img = load_image(P_ATTACK_FX)
-if slash_fx_img:
-    slash_fx_img = pygame.transform.smoothscale(slash_fx_img, (90, 90))
+# Handles start out holding None (the draw code's placeholder path) and are
+# filled in by loader.pump() as the worker finishes each file.
+loader = asset_loader.AssetLoader()
+
+def request_image(key, rel_path, size, placeholder=None, priority=asset_loader.PRIORITY_NORMAL):
+    return loader.submit(key, partial(decode_scaled_image, rel_path, size),
+                         lambda img: img.convert_alpha(), placeholder, priority)
+
+IMAGES = {
+    "tile_floor": request_image("tile_floor", P_TILE_FLOOR, (TILE_SIZE, TILE_SIZE), priority=asset_loader.PRIORITY_VISIBLE),
+    "tile_wall": request_image("tile_wall", P_TILE_WALL, (TILE_SIZE, TILE_SIZE), priority=asset_loader.PRIORITY_VISIBLE),
+    "slash_fx": request_image("slash_fx", P_ATTACK_FX, render_size((90, 90))),
+}
+
+def image(key):
+    return IMAGES[key].value
 
 # ---------- Load & slice sprite sheets into animation frames ----------
 PLAYER_FRAME_W, PLAYER_FRAME_H = 64, 64
 PLAYER_SCALE = (48, 48)
-player_frames_all = slice_sheet_to_frames(P_PLAYER_SHEET, PLAYER_FRAME_W, PLAYER_FRAME_H, scale=PLAYER_SCALE)
-
 ENEMY_FRAME_W, ENEMY_FRAME_H = 96, 121
 ENEMY_SCALE = (42, 53)
-enemy_frames_all = slice_sheet_to_frames(P_ENEMY_SHEET, ENEMY_FRAME_W, ENEMY_FRAME_H, scale=ENEMY_SCALE)
-
-# Inform about loads
-print("Asset load summary:")
-print(" player sheet frames:", len(player_frames_all), "frames found" if player_frames_all else "MISSING -> placeholder used")
-print(" enemy sheet frames :", len(enemy_frames_all), "frames found" if enemy_frames_all else "MISSING -> placeholder used")
-print(" tile_floor:", "FOUND" if tile_floor_img else "MISSING -> placeholder used")
-print(" tile_wall :", "FOUND" if tile_wall_img else "MISSING -> placeholder used")
-print(" slash_fx  :", "FOUND" if slash_fx_img else "MISSING -> placeholder FX used")
-
-# ---------- Map generation (structured) ----------
-def generate_map():
-    grid = [["W" for _ in range(MAP_TILES_X)] for _ in range(MAP_TILES_Y)]
-    mid_y = MAP_TILES_Y // 2
-    for x in range(2, MAP_TILES_X - 2):
-        for y in range(mid_y - 2, mid_y + 3):
-            grid[y][x] = "."
-    for x in range(6, MAP_TILES_X - 6, 12):
-        top = 3
-        bottom = MAP_TILES_Y - 4
-        for y in range(top, bottom):
-            if random.random() < 0.85:
-                grid[y][x] = "."
-        for dy in range(-2, 3):
-            if 0 <= mid_y + dy < MAP_TILES_Y:
-                grid[mid_y + dy][x] = "."
-    cx, cy = MAP_TILES_X // 2, MAP_TILES_Y // 2
-    for yy in range(cy - 6, cy + 7):
-        for xx in range(cx - 8, cx + 9):
-            if 0 <= xx < MAP_TILES_X and 0 <= yy < MAP_TILES_Y:
-                grid[yy][xx] = "."
-    for _ in range(10):
-        rw = random.randint(3, 7)
-        rh = random.randint(3, 6)
-        rx = random.randint(3, MAP_TILES_X - rw - 3)
-        ry = random.randint(3, MAP_TILES_Y - rh - 3)
-        for y in range(ry, ry+rh):
-            for x in range(rx, rx+rw):
-                if random.random() < 0.95:
-                    grid[y][x] = "."
-        if random.random() < 0.9:
-            if random.random() < 0.5:
-                sx = rx + rw // 2
-                for x in range(min(sx, cx), max(sx, cx)+1):
-                    for dy in range(-1,2):
-                        yy = ry + rh//2 + dy
-                        if 0 <= yy < MAP_TILES_Y:
-                            grid[yy][x] = "."
-            else:
-                sy = ry + rh // 2
-                for y in range(min(sy, cy), max(sy, cy)+1):
-                    for dx in range(-1,2):
-                        xx = rx + rw//2 + dx
-                        if 0 <= xx < MAP_TILES_X:
-                            grid[y][xx] = "."
-    for x in range(MAP_TILES_X):
-        grid[0][x] = "W"
-        grid[MAP_TILES_Y-1][x] = "W"
-    for y in range(MAP_TILES_Y):
-        grid[y][0] = "W"
-        grid[y][MAP_TILES_X-1] = "W"
-    return grid
-
-WORLD = generate_map()
+
+# ---------- Sprite atlas registry ----------
+# Sheet geometry and per-state frame ranges are worked out once at startup so
+# the animation and draw paths never go back to the filesystem.
+ANIM_STATES = ("idle", "run", "attack", "misc")
+
+def player_state_rows(rows):
+    if rows >= 4:
+        return {"idle": 0, "run": 1, "attack": 2, "misc": 3}
+    if rows == 2:
+        return {"idle": 0, "run": 1, "attack": 1, "misc": 1}
+    return None
+
+def enemy_state_rows(rows):
+    if rows >= 2:
+        return {"idle": 0, "run": 0, "attack": 1, "misc": 0}
+    return None
+
+def sheet_grid(sheet_size, frame_w, frame_h, frame_count):
+    if sheet_size:
+        return sheet_size[0] // frame_w, sheet_size[1] // frame_h
+    return max(1, frame_count), 1
+
+def build_atlas(frames, sheet_size, frame_w, frame_h, state_rows):
+    cols, rows = sheet_grid(sheet_size, frame_w, frame_h, len(frames))
+    row_map = state_rows(rows)
+    ranges = {}
+    for state in ANIM_STATES:
+        if row_map is None:
+            ranges[state] = (0, len(frames))
+        else:
+            start = row_map[state] * cols
+            ranges[state] = (start, start + cols)
+    return {
+        "frames": frames,
+        "cols": cols,
+        "rows": rows,
+        "ranges": ranges,
+        "states": {s: frames[a:b] for s, (a, b) in ranges.items()},
+    }
+
+def request_atlas(key, rel_path, frame_w, frame_h, scale, state_rows, priority=asset_loader.PRIORITY_NORMAL):
+    def finish(result):
+        frames, sheet_size = result
+        return build_atlas(convert_frames(frames), sheet_size, frame_w, frame_h, state_rows)
+    return loader.submit(key, partial(decode_sheet_frames, rel_path, frame_w, frame_h, scale),
+                         finish, None, priority)
+
+def atlas_frames(name, state):
+    atlas = ATLASES[name].value
+    if not atlas or not atlas["frames"]:
+        return []
+    return atlas["states"].get(state, atlas["states"]["idle"])
+
+ATLASES = {
+    "player": request_atlas("player", P_PLAYER_SHEET, PLAYER_FRAME_W, PLAYER_FRAME_H, render_size(PLAYER_SCALE),
+                            player_state_rows, asset_loader.PRIORITY_VISIBLE),
+    "enemy": request_atlas("enemy", P_ENEMY_SHEET, ENEMY_FRAME_W, ENEMY_FRAME_H, render_size(ENEMY_SCALE),
+                           enemy_state_rows),
+}
+
+# Inform about loads (once the loader has drained)
+def print_asset_summary():
+    player_atlas = ATLASES["player"].value
+    enemy_atlas = ATLASES["enemy"].value
+    player_frame_count = len(player_atlas["frames"]) if player_atlas else 0
+    enemy_frame_count = len(enemy_atlas["frames"]) if enemy_atlas else 0
+    print("Asset load summary:")
+    print(" player sheet frames:", player_frame_count, "frames found" if player_frame_count else "MISSING -> placeholder used")
+    print(" enemy sheet frames :", enemy_frame_count, "frames found" if enemy_frame_count else "MISSING -> placeholder used")
+    print(" tile_floor:", "FOUND" if image("tile_floor") else "MISSING -> placeholder used")
+    print(" tile_wall :", "FOUND" if image("tile_wall") else "MISSING -> placeholder used")
+    print(" slash_fx  :", "FOUND" if image("slash_fx") else "MISSING -> placeholder FX used")
+
+# ---------- World (streamed in chunks) ----------
+# drawn from the global RNG, so seeding `random` before import reproduces the map
+MAP_SEED = random.getrandbits(32)
+world = chunks.ChunkWorld(MAP_TILES_X, MAP_TILES_Y, MAP_SEED, TILE_SIZE)
+world.follow(MAP_TILES_X // 2, MAP_TILES_Y // 2)
+atexit.register(world.flush)
+# layout of a map that fits in one window (None when the map streams)
+MAP_INFO = world.info
+# the loaded window of the map; pathfinding, connectivity and collision work on
+# it in window-local tiles (world.to_local / world.to_world convert)
+WORLD = world.grid
+# connected floor regions; spawns are drawn from the player's region so every
+# enemy can reach the player
+COMPONENTS = connectivity.Components(WORLD)
 WORLD_W = MAP_TILES_X * TILE_SIZE
 WORLD_H = MAP_TILES_Y * TILE_SIZE
 
 # ---------- Player ----------
-player = {
-    "x": WORLD_W // 2 + 0.0,
-    "y": WORLD_H // 2 + 0.0,
-    "radius": 14,
-    "speed": 2.6,
-    "hp": 100,
-    "attack_cooldown": 0,
-    "attack_range": 90,
-    "swipe_timer": 0,
-    "attack_angle": 0.0,
-    "dodge_cooldown": 0,
-    "dodge_timer": 0,
-    "invincible": 0,
-    "afterimages": deque(maxlen=6),
-    "anim_state": "idle",
-    "anim_index": 0,
-    "anim_timer": 0.0,
-    "anim_frame_rate": 0.08,
-}
+class Player:
+    __slots__ = ("x", "y", "radius", "speed", "hp", "attack_cooldown", "attack_range",
+                 "swipe_timer", "attack_angle", "dodge_cooldown", "dodge_timer", "invincible",
+                 "afterimages", "anim_state", "anim_index", "anim_timer", "anim_frame_rate",
+                 "prev_x", "prev_y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        # position at the start of the current sim tick, for render interpolation
+        self.prev_x = x
+        self.prev_y = y
+        self.radius = 14
+        self.speed = 2.6
+        self.hp = 100
+        self.attack_cooldown = 0
+        self.attack_range = 90
+        self.swipe_timer = 0
+        self.attack_angle = 0.0
+        self.dodge_cooldown = 0
+        self.dodge_timer = 0
+        self.invincible = 0
+        self.afterimages = deque(maxlen=6)
+        self.anim_state = "idle"
+        self.anim_index = 0
+        self.anim_timer = 0.0
+        self.anim_frame_rate = 0.08
+
+player = Player(WORLD_W // 2 + 0.0, WORLD_H // 2 + 0.0)
 
 # ---------- spawn points ----------
-spawn_points = []
-for _ in range(30):
-    attempts = 0
-    while attempts < 300:
-        rx = random.randint(2, MAP_TILES_X - 3)
-        ry = random.randint(2, MAP_TILES_Y - 3)
-        if WORLD[ry][rx] == ".":
-            spawn_points.append((rx * TILE_SIZE + TILE_SIZE // 2, ry * TILE_SIZE + TILE_SIZE // 2))
-            break
-        attempts += 1
+def random_spawn_point():
+    # random loaded floor tile the player can walk to (centre, world px)
+    region = COMPONENTS.label(world.to_local((int(player.x // TILE_SIZE), int(player.y // TILE_SIZE))))
+    if region < 0:
+        region = COMPONENTS.largest()
+    tx, ty = world.to_world(COMPONENTS.random_tile(region))
+    return (tx * TILE_SIZE + TILE_SIZE // 2, ty * TILE_SIZE + TILE_SIZE // 2)
+
+spawn_points = [random_spawn_point() for _ in range(30)]
 
 # ---------- Enemy factory ----------
 def create_enemy(x, y):
@@ -325,6 +403,7 @@ def create_enemy(x, y):
         "path_index": 0,
         "pf_cooldown": 0,
         "pf_request": False,
+        "pf_pending": False,
         "state": "idle",
         "state_timer": 0,
         "attack_cooldown": 0,
@@ -332,94 +411,109 @@ def create_enemy(x, y):
         "attack_len": 12,
         "cooldown_len": 40,
         "last_player_tile": None,
-        "anim_state": "idle",
         "anim_index": 0,
         "anim_timer": 0.0,
         "anim_frame_rate": 0.12
     }
 
-enemies = [create_enemy(*spawn_points[i]) for i in range(min(12, len(spawn_points)))]
+# enemies live in parallel arrays; iterating / indexing yields dict-style views
+enemies = enemy_pool.EnemyPool(create_enemy(*spawn_points[i]) for i in range(min(12, len(spawn_points))))
+ai_rng = np.random.default_rng(random.getrandbits(64))
+
+# ---------- Spatial index ----------
+# Enemies are re-filed as they move; NPCs and the button are static
+# interactables. Melee and proximity checks query these instead of
+# scanning every entity.
+ENEMY_AGGRO_RANGE = 500
+# AI level of detail by distance to the player: full logic every tick out to
+# LOD_FULL_RANGE (past aggro range and the edge of the view), a coarse update
+# every LOD_COARSE_EVERY ticks out to LOD_DORMANT_RANGE, nothing beyond it
+LOD_FULL_RANGE = ENEMY_AGGRO_RANGE + 150
+LOD_DORMANT_RANGE = 1500
+LOD_COARSE_EVERY = 4
+ai_tick = 0
+lod_counts = (0, 0, 0)
+enemy_index = spatial.SpatialHash(cell_size=128)
+interactables = spatial.SpatialHash(cell_size=128)
+
+def reindex_enemies():
+    enemy_index.clear()
+    for e in enemies:
+        enemy_index.insert(e, e.x, e.y, e.radius)
+
+def sync_enemy_index():
+    # only re-file enemies whose position or size changed since the last sync
+    moved = enemies.take_moved()
+    xs = enemies.x[moved].tolist(); ys = enemies.y[moved].tolist(); rs = enemies.radius[moved].tolist()
+    for i, x, y, r in zip(moved.tolist(), xs, ys, rs):
+        enemy_index.move(enemies[i], x, y, r)
+
+reindex_enemies()
 
 # ---------- FX ----------
+class Spark:
+    __slots__ = ("x", "y", "timer", "size")
+
+    def __init__(self, x, y, timer, size):
+        self.x = x
+        self.y = y
+        self.timer = timer
+        self.size = size
+
 screen_flash = 0
 sparks = []
 
+def tick_sparks():
+    for s in sparks:
+        s.timer -= 1
+    sparks[:] = [s for s in sparks if s.timer > 0]
+
 # ---------- Camera (smooth lerp) ----------
-camera_x = player["x"] - VIEW_W / 2
-camera_y = player["y"] - VIEW_H / 2
+camera_x = player.x - VIEW_W / 2
+camera_y = player.y - VIEW_H / 2
+prev_camera_x, prev_camera_y = camera_x, camera_y
+# what this frame draws: the camera and entities blended between the last two
+# sim ticks by render_alpha (see begin_render)
+view_x, view_y = camera_x, camera_y
+render_alpha = 1.0
 
 def update_camera():
     global camera_x, camera_y
-    target_x = player["x"] - VIEW_W / 2
-    target_y = player["y"] - VIEW_H / 2
+    target_x = player.x - VIEW_W / 2
+    target_y = player.y - VIEW_H / 2
     target_x = max(0, min(WORLD_W - VIEW_W, target_x))
     target_y = max(0, min(WORLD_H - VIEW_H, target_y))
     camera_x += (target_x - camera_x) * 0.12
     camera_y += (target_y - camera_y) * 0.12
 
 def world_to_screen(wx, wy):
-    return int(wx - camera_x), int(wy - camera_y)
+    return int((wx - view_x) * RENDER_SCALE), int((wy - view_y) * RENDER_SCALE)
+
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+def begin_render(alpha):
+    global render_alpha, view_x, view_y
+    render_alpha = alpha
+    view_x = lerp(prev_camera_x, camera_x, alpha)
+    view_y = lerp(prev_camera_y, camera_y, alpha)
 
 # ---------- Collision ----------
 def can_move_entity(x, y, radius):
-    left = int((x - radius) // TILE_SIZE)
-    right = int((x + radius) // TILE_SIZE)
-    top = int((y - radius) // TILE_SIZE)
-    bottom = int((y + radius) // TILE_SIZE)
-    if top < 0 or left < 0 or bottom >= MAP_TILES_Y or right >= MAP_TILES_X:
-        return False
-    rect = pygame.Rect(x - radius, y - radius, radius * 2, radius * 2)
-    for ty in range(top, bottom + 1):
-        for tx in range(left, right + 1):
-            if WORLD[ty][tx] == "W":
-                tile_rect = pygame.Rect(tx * TILE_SIZE, ty * TILE_SIZE, TILE_SIZE, TILE_SIZE)
-                if tile_rect.colliderect(rect):
-                    return False
-    return True
-
-# ---------- Pathfinding (A*) ----------
-def neighbors(tile):
-    tx, ty = tile
-    for dx, dy in ((1,0),(-1,0),(0,1),(0,-1)):
-        nx, ny = tx + dx, ty + dy
-        if 0 <= nx < MAP_TILES_X and 0 <= ny < MAP_TILES_Y:
-            if WORLD[ny][nx] != "W":
-                yield (nx, ny)
-
-def heuristic(a, b):
-    return abs(a[0]-b[0]) + abs(a[1]-b[1])
-
-def astar(start, goal):
-    if start == goal:
-        return [start]
-    open_set = []
-    heapq.heappush(open_set, (0, start))
-    came_from = {}
-    gscore = {start:0}
-    fscore = {start: heuristic(start, goal)}
-    closed = set()
-    while open_set:
-        _, current = heapq.heappop(open_set)
-        if current == goal:
-            path = []
-            cur = current
-            while cur in came_from:
-                path.append(cur)
-                cur = came_from[cur]
-            path.append(start)
-            path.reverse()
-            return path
-        closed.add(current)
-        for nb in neighbors(current):
-            if nb in closed:
-                continue
-            tentative = gscore[current] + 1
-            if nb not in gscore or tentative < gscore[nb]:
-                came_from[nb] = current
-                gscore[nb] = tentative
-                fscore[nb] = tentative + heuristic(nb, goal)
-                heapq.heappush(open_set, (fscore[nb], nb))
-    return []
+    return world.can_move(x, y, radius)
+
+# ---------- Pathfinding (budgeted scheduler) ----------
+# Enemy path requests queue up with the scheduler, which serves the closest /
+# longest-waiting ones first and stops once PATH_BUDGET tiles of search work
+# are spent each tick (about 1 ms; counted in work, not time, so runs replay
+# the same way on any machine).
+# Chasers read their paths off one shared flow field from the player's tile,
+# rebuilt (also within the budget) after the player changes tile; the previous
+# field keeps answering while the new one is built.
+# Requests and paths are in window-local tiles; enemies keep world positions
+# and a world player tile, and their paths are dropped when the window moves.
+PATH_BUDGET = 1000
+pathing = path_scheduler.PathScheduler(WORLD, budget=PATH_BUDGET, components=COMPONENTS)
 
 def tile_from_world(x, y):
     return int(x // TILE_SIZE), int(y // TILE_SIZE)
@@ -427,206 +521,308 @@ def tile_from_world(x, y):
 # ---------- Movement / Player ----------
 def handle_player_movement(keys):
     dx = dy = 0.0
-    sp = player["speed"]
+    sp = player.speed
     if keys[pygame.K_w]: dy -= sp
     if keys[pygame.K_s]: dy += sp
     if keys[pygame.K_a]: dx -= sp
     if keys[pygame.K_d]: dx += sp
-    if player["dodge_timer"] > 0:
+    if player.dodge_timer > 0:
         dx *= 1.9; dy *= 1.9
-    new_x = player["x"] + dx
-    new_y = player["y"] + dy
-    if can_move_entity(new_x, player["y"], player["radius"]):
-        player["x"] = new_x
-    if can_move_entity(player["x"], new_y, player["radius"]):
-        player["y"] = new_y
-    if player["dodge_timer"] > 0:
-        player["afterimages"].appendleft((player["x"], player["y"], int(player["dodge_timer"] * 6)))
+    new_x = player.x + dx
+    new_y = player.y + dy
+    if can_move_entity(new_x, player.y, player.radius):
+        player.x = new_x
+    if can_move_entity(player.x, new_y, player.radius):
+        player.y = new_y
+    if player.dodge_timer > 0:
+        player.afterimages.appendleft((player.x, player.y, int(player.dodge_timer * 6)))
     else:
-        if len(player["afterimages"]) > 0:
-            player["afterimages"].popleft()
+        if len(player.afterimages) > 0:
+            player.afterimages.popleft()
 
 def player_dodge_towards_cursor():
-    if player["dodge_cooldown"] <= 0 and player["dodge_timer"] <= 0:
+    if player.dodge_cooldown <= 0 and player.dodge_timer <= 0:
         mx, my = pygame.mouse.get_pos()
-        world_mx = (mx / ZOOM) + camera_x
-        world_my = (my / ZOOM) + camera_y
-        angle = math.atan2(world_my - player["y"], world_mx - player["x"])
+        world_mx = (mx / ZOOM) + view_x
+        world_my = (my / ZOOM) + view_y
+        angle = math.atan2(world_my - player.y, world_mx - player.x)
         dash = 84
-        tx = player["x"] + math.cos(angle) * dash
-        ty = player["y"] + math.sin(angle) * dash
-        if can_move_entity(tx, player["y"], player["radius"]):
-            player["x"] = tx
-        if can_move_entity(player["x"], ty, player["radius"]):
-            player["y"] = ty
-        player["invincible"] = 28
-        player["dodge_timer"] = 14
-        player["dodge_cooldown"] = 40
+        tx = player.x + math.cos(angle) * dash
+        ty = player.y + math.sin(angle) * dash
+        if can_move_entity(tx, player.y, player.radius):
+            player.x = tx
+        if can_move_entity(player.x, ty, player.radius):
+            player.y = ty
+        player.invincible = 28
+        player.dodge_timer = 14
+        player.dodge_cooldown = 40
 
 # ---------- Enemy behavior ----------
-def enemy_request_path(e):
-    e["pf_request"] = True
-
-def compute_enemy_path(e):
-    start = tile_from_world(e["x"], e["y"])
-    goal = tile_from_world(player["x"], player["y"])
-    e["last_player_tile"] = goal
-    path = astar(start, goal)
-    e["path"] = path
-    e["path_index"] = 0
-    e["pf_cooldown"] = 36
-
-def follow_path(e):
-    if not e["path"]:
-        return
-    if e["path_index"] >= len(e["path"]):
-        return
-    tx, ty = e["path"][e["path_index"]]
-    target_x = tx * TILE_SIZE + TILE_SIZE / 2
-    target_y = ty * TILE_SIZE + TILE_SIZE / 1.999
-    dx = target_x - e["x"]; dy = target_y - e["y"]
-    dist = math.hypot(dx, dy)
-    if dist < 4:
-        e["path_index"] += 1
-        return
-    step = e["speed"]
-    nx = e["x"] + (dx / dist) * step
-    ny = e["y"] + (dy / dist) * step
-    if can_move_entity(nx, e["y"], e["radius"]):
-        e["x"] = nx
-    if can_move_entity(e["x"], ny, e["radius"]):
-        e["y"] = ny
-
-def update_enemy_ai(e):
-    if e["dead"]:
-        if e["death_timer"] > 0:
-            e["death_timer"] -= 1
-            prog = max(e["death_timer"], 0) / 30.0
-            e["fade"] = int(255 * prog)
-            e["sink"] += 0.18
-        elif e.get("respawn_timer", 0) > 0:
-            e["respawn_timer"] -= 1
-            if e["respawn_timer"] <= 0:
-                sx, sy = random.choice(spawn_points)
-                e.update({
-                    "x": sx, "y": sy,
-                    "hp": 50, "dead": False,
-                    "fade": 255, "sink": 0,
-                    "death_timer": 0,
-                    "state": "idle",
-                    "state_timer": 0,
-                    "path": [],
-                    "path_index": 0,
-                    "pf_cooldown": 0,
-                    "pf_request": False,
-                    "anim_state": "idle",
-                    "anim_index": 0,
-                    "anim_timer": 0.0,
-                })
-        return
-
-    if e["pf_cooldown"] > 0:
-        e["pf_cooldown"] -= 1
-    if e.get("pf_request", False) and e["pf_cooldown"] <= 0:
-        compute_enemy_path(e)
-        e["pf_request"] = False
-
-    px, py = player["x"], player["y"]
-    dx = px - e["x"]; dy = py - e["y"]
-    dist = math.hypot(dx, dy)
-
-    attack_dist = player["radius"] + e["radius"] + 10
-    if dist <= attack_dist + 18 and e["state"] not in ("telegraph","attack","cooldown"):
-        e["state"] = "telegraph"
-        e["state_timer"] = e["telegraph_len"]
-        return
-
-    if dist > 500:
-        if random.random() < 0.01:
-            nx = e["x"] + random.uniform(-1,1)*20
-            ny = e["y"] + random.uniform(-1,1)*20
-            if can_move_entity(nx, e["y"], e["radius"]):
-                e["x"] = nx
-            if can_move_entity(e["x"], ny, e["radius"]):
-                e["y"] = ny
-        if e["pf_cooldown"] <= 0 and random.random() < 0.04:
-            enemy_request_path(e)
+def apply_enemy_path(e, goal, path):
+    e.last_player_tile = goal
+    e.path = path
+    e.path_index = 0
+    e.pf_cooldown = 36
+
+def order_wander(idx, scale=1):
+    # a random step of up to 20 * scale px on each axis
+    pool = enemies
+    for i in idx.tolist():
+        pool.move_x[i] = random.uniform(-1,1)*20*scale
+        pool.move_y[i] = random.uniform(-1,1)*20*scale
+    pool.move_order[idx] = enemy_pool.MOVE_WANDER
+
+def chase_player(chasing, dist):
+    # replan where needed, then send every chaser towards its next waypoint
+    # (or straight at the player when it has no path)
+    pool = enemies
+    n = pool.n
+    tx, ty = tile_from_world(player.x, player.y)
+    stale = (pool.path_len[:n] == 0) | (pool.last_tile_x[:n] != tx) | (pool.last_tile_y[:n] != ty)
+    pool.pf_request[:n][chasing & stale & (pool.pf_cooldown[:n] <= 0)] = True
+
+    path_len = pool.path_len[:n]
+    path_index = pool.path_index[:n]
+
+    following = np.flatnonzero(chasing & (path_len > 0) & (path_index < path_len))
+    if following.size:
+        paths = pool.paths
+        waypoints = np.array([paths[i][path_index[i]] for i in following], dtype=np.float64).reshape(-1, 2)
+        wx = (waypoints[:, 0] + world.ox) * TILE_SIZE + TILE_SIZE / 2
+        wy = (waypoints[:, 1] + world.oy) * TILE_SIZE + TILE_SIZE / 1.999
+        arrived = np.hypot(wx - pool.x[following], wy - pool.y[following]) < 4
+        path_index[following[arrived]] += 1
+        go = following[~arrived]
+        pool.move_order[go] = enemy_pool.MOVE_WAYPOINT
+        pool.move_x[go] = wx[~arrived]
+        pool.move_y[go] = wy[~arrived]
+
+    direct = chasing & (path_len == 0) & (dist > 2)
+    pool.move_order[:n][direct] = enemy_pool.MOVE_DIRECT
+
+def move_enemies():
+    # carry out this tick's move orders, split over the AI workers if enabled
+    n = enemies.n
+    movers = np.flatnonzero(enemies.move_order[:n] != enemy_pool.MOVE_NONE)
+    move = ai_worker_pool.move if ai_worker_pool is not None else ai_workers.move
+    move(world.grid, TILE_SIZE, world.ox, world.oy, player.x, player.y, enemies, movers)
+
+def respawn_enemy(e):
+    sx, sy = random_spawn_point()
+    e.update({
+        "x": sx, "y": sy,
+        "prev_x": sx, "prev_y": sy,
+        "hp": 50, "dead": False,
+        "fade": 255, "sink": 0,
+        "death_timer": 0,
+        "state": "idle",
+        "state_timer": 0,
+        "path": [],
+        "path_index": 0,
+        "pf_cooldown": 0,
+        "pf_request": False,
+        "pf_pending": False,
+        "anim_index": 0,
+        "anim_timer": 0.0,
+    })
+    pathing.cancel(e.i)
+
+def lod_tiers(dist):
+    return np.where(dist <= LOD_FULL_RANGE, enemy_pool.LOD_FULL,
+                    np.where(dist <= LOD_DORMANT_RANGE, enemy_pool.LOD_COARSE, enemy_pool.LOD_DORMANT))
+
+def update_lod():
+    # AI tier of every enemy for this tick, before path requests or the AI read it
+    global lod_counts
+    pool = enemies
+    n = pool.n
+    lod = pool.lod[:n]
+    lod[:] = lod_tiers(np.hypot(player.x - pool.x[:n], player.y - pool.y[:n]))
+    alive = ~pool.dead[:n] & world.contains_px(pool.x[:n], pool.y[:n])
+    lod_counts = tuple(np.bincount(lod[alive], minlength=3).tolist())
+
+def update_enemy_ai():
+    # One pass over the whole pool. Timers, distances, the telegraph trigger,
+    # the strike test and the death fade are array ops; movement is one batch
+    # of move orders (move_enemies).
+    global screen_flash, ai_tick
+    pool = enemies
+    n = pool.n
+    if n == 0:
         return
-
-    player_tile = tile_from_world(px, py)
-    if not e["path"] or e.get("last_player_tile") != player_tile:
-        if e["pf_cooldown"] <= 0:
-            compute_enemy_path(e)
-    if e["path"]:
-        follow_path(e)
-    else:
-        if dist > 2:
-            nx = e["x"] + (dx / dist) * e["speed"]
-            ny = e["y"] + (dy / dist) * e["speed"]
-            if can_move_entity(nx, e["y"], e["radius"]):
-                e["x"] = nx
-            if can_move_entity(e["x"], ny, e["radius"]):
-                e["y"] = ny
-
-    if e["state"] == "telegraph":
-        e["state_timer"] -= 1
-        if e["state_timer"] <= 0:
-            e["state"] = "attack"
-            e["state_timer"] = e["attack_len"]
-    elif e["state"] == "attack":
-        mid = e["attack_len"] // 2
-        if e["state_timer"] == mid:
-            ex, ey = e["x"], e["y"]
-            dxp = player["x"] - ex; dyp = player["y"] - ey
-            if math.hypot(dxp, dyp) <= (player["radius"] + e["radius"] + 6):
-                if player["invincible"] <= 0:
-                    player["hp"] -= 10  # Increased from 6.5 to 10 (about 54% increase)
-                    global screen_flash
-                    screen_flash = max(screen_flash, 8)
-                    player["invincible"] = 20
-        e["state_timer"] -= 1
-        if e["state_timer"] <= 0:
-            e["state"] = "cooldown"
-            e["state_timer"] = e["cooldown_len"]
-    elif e["state"] == "cooldown":
-        e["state_timer"] -= 1
-        if e["state_timer"] <= 0:
-            e["state"] = "idle"
+    ai_tick += 1
+    dead = pool.dead[:n].copy()
+    pool.move_order[:n] = enemy_pool.MOVE_NONE
+    # enemies in unloaded chunks are frozen where they stand
+    alive = ~dead & world.contains_px(pool.x[:n], pool.y[:n])
+
+    # death fade, then the respawn countdown once the body has faded out
+    death_timer = pool.death_timer[:n]
+    fading = dead & (death_timer > 0)
+    death_timer[fading] -= 1
+    pool.fade[:n][fading] = (255 * np.maximum(death_timer[fading], 0) / 30.0).astype(np.int64)
+    pool.sink[:n][fading] += 0.18
+    respawn = pool.respawn_timer[:n]
+    waiting = dead & ~fading & (respawn > 0)
+    respawn[waiting] -= 1
+    respawned = np.flatnonzero(waiting & (respawn <= 0))
+    for i in respawned:
+        respawn_enemy(pool[i])
+
+    pf_cooldown = pool.pf_cooldown[:n]
+    pf_cooldown[alive & (pf_cooldown > 0)] -= 1
+
+    px, py = player.x, player.y
+    dx = px - pool.x[:n]
+    dy = py - pool.y[:n]
+    dist = np.hypot(dx, dy)
+
+    state = pool.state[:n]
+    state_timer = pool.state_timer[:n]
+    attack_dist = player.radius + pool.radius[:n] + 10
+    trigger = alive & (state == enemy_pool.IDLE) & (dist <= attack_dist + 18)
+    state[trigger] = enemy_pool.TELEGRAPH
+    state_timer[trigger] = pool.telegraph_len[:n][trigger]
+
+    far = alive & ~trigger & (dist > ENEMY_AGGRO_RANGE)
+    near = alive & ~trigger & ~far
+
+    # tiers come from update_lod(); respawned enemies just moved, so redo theirs
+    lod = pool.lod[:n]
+    lod[respawned] = lod_tiers(dist[respawned])
+
+    # full tier: wander and speculative replans every tick
+    far_idx = np.flatnonzero(far & (lod == enemy_pool.LOD_FULL))
+    if far_idx.size:
+        rolls = ai_rng.random((2, far_idx.size))
+        order_wander(far_idx[rolls[0] < 0.01])
+        pool.pf_request[far_idx[(rolls[1] < 0.04) & (pf_cooldown[far_idx] <= 0)]] = True
+    # coarse tier: a quarter of them per tick (staggered by slot), each taking
+    # the full tier's wander odds but LOD_COARSE_EVERY times the step, so they
+    # cover the same ground in fewer, bigger moves; no speculative replans,
+    # they ask for a path once they are close enough to chase
+    coarse_idx = np.flatnonzero(far & (lod == enemy_pool.LOD_COARSE))
+    coarse_idx = coarse_idx[(coarse_idx + ai_tick) % LOD_COARSE_EVERY == 0]
+    if coarse_idx.size:
+        order_wander(coarse_idx[ai_rng.random(coarse_idx.size) < 0.01], LOD_COARSE_EVERY)
+
+    chase_player(near, dist)
+    move_enemies()
+
+    # state machine; each enemy takes at most one transition per tick
+    telegraph = near & (state == enemy_pool.TELEGRAPH)
+    attacking = near & (state == enemy_pool.ATTACK)
+    cooling = near & (state == enemy_pool.COOLDOWN)
+
+    state_timer[telegraph] -= 1
+    to_attack = telegraph & (state_timer <= 0)
+    state[to_attack] = enemy_pool.ATTACK
+    state_timer[to_attack] = pool.attack_len[:n][to_attack]
+
+    striking = attacking & (state_timer == pool.attack_len[:n] // 2)
+    if striking.any():
+        # positions have moved since `dist` was taken
+        reach = player.radius + pool.radius[:n] + 6
+        hit = striking & (np.hypot(px - pool.x[:n], py - pool.y[:n]) <= reach)
+        if hit.any() and player.invincible <= 0:
+            player.hp -= 10  # Increased from 6.5 to 10 (about 54% increase)
+            screen_flash = max(screen_flash, 8)
+            player.invincible = 20
+    state_timer[attacking] -= 1
+    to_cooldown = attacking & (state_timer <= 0)
+    state[to_cooldown] = enemy_pool.COOLDOWN
+    state_timer[to_cooldown] = pool.cooldown_len[:n][to_cooldown]
+
+    state_timer[cooling] -= 1
+    state[cooling & (state_timer <= 0)] = enemy_pool.IDLE
+
+def request_stale_paths():
+    # the player changed tile since these enemies last planned
+    n = enemies.n
+    tx, ty = tile_from_world(player.x, player.y)
+    stale = ((enemies.last_tile_x[:n] != tx) | (enemies.last_tile_y[:n] != ty)) & (enemies.pf_cooldown[:n] <= 0)
+    loaded = world.contains_px(enemies.x[:n], enemies.y[:n])
+    full = enemies.lod[:n] == enemy_pool.LOD_FULL
+    enemies.pf_request[:n][~enemies.dead[:n] & loaded & full & stale] = True
+
+def service_path_requests():
+    n = enemies.n
+    px, py = player.x, player.y
+    new = np.flatnonzero(enemies.pf_request[:n] & ~enemies.pf_pending[:n] & ~enemies.dead[:n] &
+                         (enemies.pf_cooldown[:n] <= 0) & world.contains_px(enemies.x[:n], enemies.y[:n]))
+    if new.size:
+        xs = enemies.x[new]
+        ys = enemies.y[new]
+        # priority: distance to the player in tiles (the scheduler adds waiting time)
+        near = (np.hypot(xs - px, ys - py) / TILE_SIZE).tolist()
+        for i, x, y, prio in zip(new.tolist(), xs.tolist(), ys.tolist(), near):
+            pathing.submit(i, world.to_local(tile_from_world(x, y)), None, prio)
+        enemies.pf_pending[new] = True
+
+    pathing.set_goal(world.to_local(tile_from_world(px, py)))
+    for i, goal, path in pathing.run():
+        e = enemies[i]
+        e.pf_request = False
+        e.pf_pending = False
+        if not e.dead:
+            apply_enemy_path(e, world.to_world(goal), path)
+
+def on_world_moved():
+    # the window moved: local paths and queued requests point at the wrong tiles
+    pathing.clear()
+    n = enemies.n
+    for i in range(n):
+        enemies.paths[i] = []
+    enemies.path_len[:n] = 0
+    enemies.path_index[:n] = 0
+    enemies.pf_pending[:n] = False
+    enemies.last_tile_x[:n] = -1
+    enemies.last_tile_y[:n] = -1
+
+def tick_respawns():
+    n = enemies.n
+    respawn = enemies.respawn_timer[:n]
+    waiting = enemies.dead[:n] & (respawn > 0)
+    respawn[waiting] -= 1
+    for i in np.flatnonzero(waiting & (respawn <= 0)):
+        e = enemies[i]
+        sx, sy = random_spawn_point()
+        e.x, e.y = sx, sy
+        e.prev_x, e.prev_y = sx, sy
+        # a path queued from where it died is no use here
+        pathing.cancel(i)
+        e.pf_pending = False
+        e.hp = 50; e.dead = False; e.fade=255; e.sink=0; e.death_timer=0
 
 # ---------- Attacks / Player attack ----------
 def perform_attack(mouse_pos_screen):
-    if player["attack_cooldown"] > 0:
+    if player.attack_cooldown > 0:
         return
-    player["attack_cooldown"] = 32
-    player["swipe_timer"] = 10
-    mx = (mouse_pos_screen[0] / ZOOM) + camera_x
-    my = (mouse_pos_screen[1] / ZOOM) + camera_y
-    px, py = player["x"], player["y"]
+    player.attack_cooldown = 32
+    player.swipe_timer = 10
+    mx = (mouse_pos_screen[0] / ZOOM) + view_x
+    my = (mouse_pos_screen[1] / ZOOM) + view_y
+    px, py = player.x, player.y
     angle = math.atan2(my - py, mx - px)
-    player["attack_angle"] = angle
-    attack_range = player["attack_range"]
+    player.attack_angle = angle
+    attack_range = player.attack_range
     attack_arc = math.radians(92)
-    for e in enemies:
-        if e["dead"]: continue
-        ex, ey = e["x"], e["y"]
-        dist = math.hypot(ex - px, ey - py)
-        if dist <= attack_range + e["radius"]:
-            angle_to_enemy = math.atan2(ey - py, ex - px)
-            diff = abs((angle_to_enemy - angle + math.pi) % (2*math.pi) - math.pi)
-            if diff <= attack_arc / 2:
-                e["hp"] -= 28
-                sparks.append({"x": ex, "y": ey, "timer": 18, "size": random.randint(6, 11)})
-                global screen_flash
-                screen_flash = max(screen_flash, 10)
-                if e["hp"] <= 0:
-                    e["hp"] = 0
-                    e["dead"] = True
-                    e["death_timer"] = 30
-                    e["respawn_timer"] = 600
+    for e in enemy_index.query_arc(px, py, attack_range, angle, attack_arc):
+        if e.dead: continue
+        ex, ey = e.x, e.y
+        e.hp -= 28
+        sparks.append(Spark(ex, ey, 18, random.randint(6, 11)))
+        global screen_flash
+        screen_flash = max(screen_flash, 10)
+        if e.hp <= 0:
+            e.hp = 0
+            e.dead = True
+            e.death_timer = 30
+            e.respawn_timer = 600
 
 # ---------- Animation helpers ----------
 def player_choose_anim_state(keys):
-    if player["swipe_timer"] > 0:
+    if player.swipe_timer > 0:
         return "attack"
     moving = keys[pygame.K_w] or keys[pygame.K_s] or keys[pygame.K_a] or keys[pygame.K_d]
     if moving:
@@ -635,238 +831,228 @@ def player_choose_anim_state(keys):
 
 def tick_player_anim(dt, keys):
     desired = player_choose_anim_state(keys)
-    if player["anim_state"] != desired:
-        player["anim_state"] = desired
-        player["anim_index"] = 0
-        player["anim_timer"] = 0.0
-    frames = []
-    if player_frames_all:
-        p = find_asset(P_PLAYER_SHEET)
-        if p:
-            try:
-                sheet = pygame.image.load(p)
-                sheet_w, sheet_h = sheet.get_size()
-                cols = sheet_w // PLAYER_FRAME_W
-                rows = sheet_h // PLAYER_FRAME_H
-            except:
-                cols = max(1, len(player_frames_all))
-                rows = 1
-        else:
-            cols = max(1, len(player_frames_all))
-            rows = 1
-        if rows >= 4:
-            row_map = {"idle":0, "run":1, "attack":2, "misc":3}
-            r = row_map.get(player["anim_state"], 0)
-            start = r * cols
-            frames = player_frames_all[start:start+cols]
-        elif rows == 2:
-            if player["anim_state"] == "idle":
-                frames = player_frames_all[0:cols]
-            else:
-                frames = player_frames_all[cols:cols*2]
-        else:
-            frames = player_frames_all
+    if player.anim_state != desired:
+        player.anim_state = desired
+        player.anim_index = 0
+        player.anim_timer = 0.0
+    frames = atlas_frames("player", player.anim_state)
     if frames:
-        player["anim_timer"] += dt
-        if player["anim_timer"] >= player["anim_frame_rate"]:
-            player["anim_timer"] = 0.0
-            player["anim_index"] = (player["anim_index"] + 1) % len(frames)
-
-def tick_enemy_anim(e, dt):
-    if not enemy_frames_all:
-        return
-    p = find_asset(P_ENEMY_SHEET)
-    if p:
-        try:
-            sheet = pygame.image.load(p)
-            sheet_w, sheet_h = sheet.get_size()
-            cols = sheet_w // ENEMY_FRAME_W
-            rows = sheet_h // ENEMY_FRAME_H
-        except:
-            cols = max(1, len(enemy_frames_all))
-            rows = 1
+        player.anim_timer += dt
+        if player.anim_timer >= player.anim_frame_rate:
+            player.anim_timer = 0.0
+            player.anim_index = (player.anim_index + 1) % len(frames)
+
+def enemy_anim_state(e):
+    return "attack" if e.state == "attack" else "idle"
+
+def tick_enemy_anim(dt):
+    n = enemies.n
+    counts = np.where(enemies.state[:n] == enemy_pool.ATTACK,
+                      len(atlas_frames("enemy", "attack")), len(atlas_frames("enemy", "idle")))
+    timer = enemies.anim_timer[:n]
+    index = enemies.anim_index[:n]
+    animated = counts > 0
+    timer[animated] += dt
+    roll = animated & (timer >= enemies.anim_frame_rate[:n])
+    timer[roll] = 0.0
+    index[roll] = (index[roll] + 1) % counts[roll]
+
+# ---------- Tilemap chunk cache ----------
+# Tiles rarely change, so they are pre-rendered into
+# CHUNK_TILES x CHUNK_TILES surfaces and draw_world only blits the handful of
+# chunks overlapping the view. Least recently drawn chunks are evicted once
+# the cache is full; any tile edit drops the chunk it touches.
+CHUNK_TILES = 16
+CHUNK_PX = CHUNK_TILES * TILE_SIZE
+CHUNKS_X = (MAP_TILES_X + CHUNK_TILES - 1) // CHUNK_TILES
+CHUNKS_Y = (MAP_TILES_Y + CHUNK_TILES - 1) // CHUNK_TILES
+CHUNK_CACHE_MAX = 9
+chunk_cache = OrderedDict()
+chunk_art = (None, None)
+
+def render_chunk(cx, cy, wall_img, floor_img):
+    x0, y0 = cx * CHUNK_TILES, cy * CHUNK_TILES
+    x1 = min(MAP_TILES_X, x0 + CHUNK_TILES)
+    y1 = min(MAP_TILES_Y, y0 + CHUNK_TILES)
+    surf = pygame.Surface(((x1 - x0) * TILE_SIZE, (y1 - y0) * TILE_SIZE)).convert()
+    surf.fill(BLACK)
+    solid = world.solid_block(x0, y0, x1, y1).tolist()
+    for ty in range(y0, y1):
+        row = solid[ty - y0]
+        for tx in range(x0, x1):
+            dest = pygame.Rect((tx - x0) * TILE_SIZE, (ty - y0) * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+            if row[tx - x0]:
+                if wall_img:
+                    surf.blit(wall_img, dest)
+                else:
+                    pygame.draw.rect(surf, WALL_COLOR, dest)
+            else:
+                if floor_img:
+                    surf.blit(floor_img, dest)
+                else:
+                    pygame.draw.rect(surf, FLOOR_COLOR, dest)
+    if RENDER_SCALE != 1.0:
+        # native mode: scale once per chunk here instead of the whole view per frame
+        w, h = surf.get_size()
+        surf = pygame.transform.smoothscale(surf, (math.ceil(w * RENDER_SCALE), math.ceil(h * RENDER_SCALE)))
+    return surf
+
+def get_chunk(cx, cy):
+    global chunk_art
+    art = (image("tile_wall"), image("tile_floor"))
+    if art[0] is not chunk_art[0] or art[1] is not chunk_art[1]:
+        # tile art streamed in (or changed): every cached chunk is stale
+        chunk_cache.clear()
+        chunk_art = art
+    key = (cx, cy)
+    surf = chunk_cache.get(key)
+    if surf is None:
+        surf = render_chunk(cx, cy, *art)
+        chunk_cache[key] = surf
+        while len(chunk_cache) > CHUNK_CACHE_MAX:
+            chunk_cache.popitem(last=False)
     else:
-        cols = max(1, len(enemy_frames_all))
-        rows = 1
-    if rows >= 2:
-        if e["state"] == "attack":
-            start = cols * 1
-            frames = enemy_frames_all[start:start+cols]
-        else:
-            frames = enemy_frames_all[0:cols]
+        chunk_cache.move_to_end(key)
+    return surf
+
+def on_tile_edited(tx, ty):
+    # one tile edited (world.set() or WORLD[y][x] = ...); (None, None) = the streamed window moved
+    if tx is None:
+        chunk_cache.clear()
     else:
-        frames = enemy_frames_all
-    if not frames:
-        return
-    e["anim_timer"] += dt
-    if e["anim_timer"] >= e["anim_frame_rate"]:
-        e["anim_timer"] = 0.0
-        e["anim_index"] = (e["anim_index"] + 1) % len(frames)
+        chunk_cache.pop((tx // CHUNK_TILES, ty // CHUNK_TILES), None)
+
+world.listeners.append(on_tile_edited)
+
+# ---------- FX surfaces ----------
+# Overlays and FX come from a scratch pool (recycled every frame) or from
+# pre-baked sprites keyed by shape/size/alpha, instead of new surfaces per draw.
+fx_pool = surface_pool.SurfacePool()
+fx_sprites = surface_pool.SpriteCache()
+
+def circle_sprite(r, rgba, pad=0):
+    def build():
+        surf = pygame.Surface((r*2 + pad*2, r*2 + pad*2), pygame.SRCALPHA)
+        pygame.draw.circle(surf, rgba, (r + pad, r + pad), r)
+        return surf
+    return fx_sprites.get(("circle", r, rgba, pad), build)
+
+def fill_sprite(size, rgba):
+    def build():
+        surf = pygame.Surface(size, pygame.SRCALPHA)
+        surf.fill(rgba)
+        return surf
+    return fx_sprites.get(("fill", size, rgba), build)
+
+def tinted_sprite(img, rgba):
+    def build():
+        tmp = img.copy()
+        tmp.blit(fill_sprite(tmp.get_size(), rgba), (0,0), special_flags=pygame.BLEND_RGBA_ADD)
+        return tmp
+    return fx_sprites.get(("tint", img, rgba), build)
 
 # ---------- Draw helpers ----------
 def draw_world(target_surf):
-    left_tile = max(0, int(camera_x // TILE_SIZE) - 1)
-    right_tile = min(MAP_TILES_X - 1, int((camera_x + VIEW_W) // TILE_SIZE) + 1)
-    top_tile = max(0, int((camera_y // TILE_SIZE) - 1))
-    bottom_tile = min(MAP_TILES_Y - 1, int((camera_y + VIEW_H) // TILE_SIZE) + 1)
-    for ty in range(top_tile, bottom_tile + 1):
-        for tx in range(left_tile, right_tile + 1):
-            ch = WORLD[ty][tx]
-            dest = pygame.Rect(tx * TILE_SIZE - camera_x, ty * TILE_SIZE - camera_y, TILE_SIZE, TILE_SIZE)
-            if ch == "W":
-                if tile_wall_img:
-                    target_surf.blit(tile_wall_img, dest)
-                else:
-                    pygame.draw.rect(target_surf, WALL_COLOR, dest)
-            else:
-                if tile_floor_img:
-                    target_surf.blit(tile_floor_img, dest)
-                else:
-                    pygame.draw.rect(target_surf, FLOOR_COLOR, dest)
+    first_cx = max(0, int(view_x // CHUNK_PX))
+    last_cx = min(CHUNKS_X - 1, int((view_x + VIEW_W) // CHUNK_PX))
+    first_cy = max(0, int(view_y // CHUNK_PX))
+    last_cy = min(CHUNKS_Y - 1, int((view_y + VIEW_H) // CHUNK_PX))
+    for cy in range(first_cy, last_cy + 1):
+        for cx in range(first_cx, last_cx + 1):
+            dest = (math.floor((cx * CHUNK_PX - view_x) * RENDER_SCALE),
+                    math.floor((cy * CHUNK_PX - view_y) * RENDER_SCALE))
+            target_surf.blit(get_chunk(cx, cy), dest)
 
 def draw_afterimages(target_surf):
-    if not player["afterimages"]:
+    if not player.afterimages:
         return
-    surf = pygame.Surface((player["radius"]*2, player["radius"]*2), pygame.SRCALPHA)
-    for (ax, ay, life) in player["afterimages"]:
+    r = to_px(player.radius)
+    for (ax, ay, life) in player.afterimages:
         alpha = max(16, min(110, life * 6))
-        surf.fill((0,0,0,0))
-        pygame.draw.circle(surf, (255,255,255,alpha), (player["radius"], player["radius"]), player["radius"])
+        surf = circle_sprite(r, (255,255,255,alpha))
         sx, sy = world_to_screen(ax, ay)
-        target_surf.blit(surf, (sx - player["radius"], sy - player["radius"]))
+        target_surf.blit(surf, (sx - r, sy - r))
 
 def draw_player(target_surf, keys):
-    sx, sy = world_to_screen(player["x"], player["y"])
-    frames = []
-    if player_frames_all:
-        p = find_asset(P_PLAYER_SHEET)
-        if p:
-            try:
-                sheet = pygame.image.load(p)
-                sheet_w, sheet_h = sheet.get_size()
-                cols = sheet_w // PLAYER_FRAME_W
-                rows = sheet_h // PLAYER_FRAME_H
-            except:
-                cols = max(1, len(player_frames_all))
-                rows = 1
-        else:
-            cols = max(1, len(player_frames_all))
-            rows = 1
-        if rows >= 4:
-            row_map = {"idle":0, "run":1, "attack":2, "misc":3}
-            r = row_map.get(player["anim_state"], 0)
-            start = r * cols
-            frames = player_frames_all[start:start+cols]
-        elif rows == 2:
-            if player["anim_state"] == "idle":
-                frames = player_frames_all[0:cols]
-            else:
-                frames = player_frames_all[cols:cols*2]
-        else:
-            frames = player_frames_all
-
+    px = lerp(player.prev_x, player.x, render_alpha)
+    py = lerp(player.prev_y, player.y, render_alpha)
+    sx, sy = world_to_screen(px, py)
+    frames = atlas_frames("player", player.anim_state)
     if frames:
-        idx = player["anim_index"] % len(frames)
+        idx = player.anim_index % len(frames)
         img = frames[idx]
         rect = img.get_rect(center=(sx, sy))
-        if player["invincible"] > 0:
-            tmp = img.copy()
-            tint = pygame.Surface(tmp.get_size(), pygame.SRCALPHA)
-            tint.fill((255, 220, 200, 90))
-            tmp.blit(tint, (0,0), special_flags=pygame.BLEND_RGBA_ADD)
-            target_surf.blit(tmp, rect)
+        if player.invincible > 0:
+            target_surf.blit(tinted_sprite(img, (255, 220, 200, 90)), rect)
         else:
             target_surf.blit(img, rect)
     else:
-        body_color = (220, 30, 30) if player["invincible"] <= 0 else (255, 200, 180)
-        pygame.draw.circle(target_surf, body_color, (sx, sy), player["radius"])
-
-    if player["swipe_timer"] > 0:
-        length = player["attack_range"]
-        angle = player["attack_angle"]
-        x2 = player["x"] + math.cos(angle) * length
-        y2 = player["y"] + math.sin(angle) * length
+        body_color = (220, 30, 30) if player.invincible <= 0 else (255, 200, 180)
+        pygame.draw.circle(target_surf, body_color, (sx, sy), to_px(player.radius))
+
+    if player.swipe_timer > 0:
+        length = player.attack_range
+        angle = player.attack_angle
+        x2 = px + math.cos(angle) * length
+        y2 = py + math.sin(angle) * length
         x2s, y2s = world_to_screen(x2, y2)
+        slash_fx_img = image("slash_fx")
         if slash_fx_img:
             offset_x = (x2s + sx) // 2 - slash_fx_img.get_width() // 2
             offset_y = (y2s + sy) // 2 - slash_fx_img.get_height() // 2
             target_surf.blit(slash_fx_img, (offset_x, offset_y))
         else:
-            surf = pygame.Surface((VIEW_W, VIEW_H), pygame.SRCALPHA)
-            pygame.draw.line(surf, SLASH_COLOR + (120,), (sx, sy), (x2s, y2s), 18)
+            surf = fx_pool.acquire(*target_surf.get_size())
+            pygame.draw.line(surf, SLASH_COLOR + (120,), (sx, sy), (x2s, y2s), to_px(18))
             target_surf.blit(surf, (0, 0))
 
-def draw_enemies(target_surf, dt):
-    for e in enemies:
-        sx, sy = world_to_screen(e["x"], e["y"] + e.get("sink", 0))
-        if e["dead"]:
-            surf = pygame.Surface((e["radius"]*2+4, e["radius"]*2+4), pygame.SRCALPHA)
-            clr = (120,120,160, max(0, e["fade"]))
-            pygame.draw.circle(surf, clr, (e["radius"]+2, e["radius"]+2), e["radius"])
-            target_surf.blit(surf, (sx - e["radius"], sy - e["radius"]))
+def draw_enemies(target_surf):
+    n = enemies.n
+    # telegraph rings reach 3x the radius
+    reach = enemies.radius[:n] * 3
+    ex = lerp(enemies.prev_x[:n], enemies.x[:n], render_alpha)
+    ey = lerp(enemies.prev_y[:n], enemies.y[:n], render_alpha) + enemies.sink[:n]
+    visible = ((ex + reach >= view_x) & (ex - reach <= view_x + VIEW_W) &
+               (ey + reach >= view_y) & (ey - reach <= view_y + VIEW_H))
+    for i in np.flatnonzero(visible):
+        e = enemies[i]
+        sx, sy = world_to_screen(ex.item(i), ey.item(i))
+        r = to_px(e.radius)
+        if e.dead:
+            surf = circle_sprite(r, (120,120,160, max(0, e.fade)), pad=2)
+            target_surf.blit(surf, (sx - r, sy - r))
             continue
 
-        if e["state"] == "telegraph":
+        if e.state == "telegraph":
             alpha = 180
-            surf = pygame.Surface((e["radius"]*6, e["radius"]*6), pygame.SRCALPHA)
-            pygame.draw.circle(surf, TELEGRAPH_COLOR + (alpha,), (surf.get_width()//2, surf.get_height()//2), e["radius"]*3)
+            surf = circle_sprite(r*3, TELEGRAPH_COLOR + (alpha,))
             target_surf.blit(surf, (sx - surf.get_width()//2, sy - surf.get_height()//2))
 
-        frames = []
-        if enemy_frames_all:
-            p = find_asset(P_ENEMY_SHEET)
-            if p:
-                try:
-                    sheet = pygame.image.load(p)
-                    sheet_w, sheet_h = sheet.get_size()
-                    cols = sheet_w // ENEMY_FRAME_W
-                    rows = sheet_h // ENEMY_FRAME_H
-                except:
-                    cols = max(1, len(enemy_frames_all))
-                    rows = 1
-            else:
-                cols = max(1, len(enemy_frames_all))
-                rows = 1
-
-            if rows >= 2:
-                if e["state"] == "attack":
-                    frames = enemy_frames_all[cols:cols*2]
-                else:
-                    frames = enemy_frames_all[0:cols]
-            else:
-                frames = enemy_frames_all
-
+        frames = atlas_frames("enemy", enemy_anim_state(e))
         if frames:
-            idx = e["anim_index"] % len(frames)
+            idx = e.anim_index % len(frames)
             img = frames[idx]
             rect = img.get_rect(center=(sx, sy))
             target_surf.blit(img, rect)
         else:
-            pygame.draw.circle(target_surf, DARK_GRAY, (sx, sy), e["radius"])
+            pygame.draw.circle(target_surf, DARK_GRAY, (sx, sy), r)
 
-        if e["hp"] < 50:
-            w = int((e["hp"]/50.0) * (e["radius"]*2))
-            pygame.draw.rect(target_surf, (80,0,0), (sx - e["radius"], sy - e["radius"] - 8, e["radius"]*2, 5))
-            pygame.draw.rect(target_surf, (200,0,0), (sx - e["radius"], sy - e["radius"] - 8, w, 5))
+        if e.hp < 50:
+            w = int((e.hp/50.0) * (r*2))
+            pygame.draw.rect(target_surf, (80,0,0), (sx - r, sy - r - to_px(8), r*2, to_px(5)))
+            pygame.draw.rect(target_surf, (200,0,0), (sx - r, sy - r - to_px(8), w, to_px(5)))
 
 def draw_sparks_and_flash(target_surf):
-    global screen_flash
-    for s in list(sparks):
-        age = s["timer"]
+    for s in sparks:
+        age = s.timer
         alpha = max(0, min(255, int(255 * (age / 20.0))))
-        size = s["size"] * (1 + (1 - age/20.0))
-        surf = pygame.Surface((int(size*2)+6, int(size*2)+6), pygame.SRCALPHA)
-        pygame.draw.circle(surf, (SPARK_COLOR[0], SPARK_COLOR[1], SPARK_COLOR[2], alpha), (int(size)+3,int(size)+3), int(size))
-        sx, sy = world_to_screen(s["x"], s["y"])
+        size = s.size * (1 + (1 - age/20.0)) * RENDER_SCALE
+        surf = circle_sprite(int(size), (SPARK_COLOR[0], SPARK_COLOR[1], SPARK_COLOR[2], alpha), pad=3)
+        sx, sy = world_to_screen(s.x, s.y)
         target_surf.blit(surf, (sx - size - 2, sy - size - 2))
-        s["timer"] -= 1
-        if s["timer"] <= 0:
-            sparks.remove(s)
     if screen_flash > 0:
         flash_alpha = int(80 * (screen_flash / 12.0))
-        overlay = pygame.Surface((VIEW_W, VIEW_H), pygame.SRCALPHA)
-        overlay.fill((255, 255, 255, flash_alpha))
-        target_surf.blit(overlay, (0, 0))
+        target_surf.blit(fill_sprite(target_surf.get_size(), (255, 255, 255, flash_alpha)), (0, 0))
 
 # ---------- Pause menu buttons ----------
 BTN_W = 220; BTN_H = 44
@@ -878,33 +1064,28 @@ death_btn_restart_rect = pygame.Rect(WIDTH//2 - BTN_W//2, HEIGHT//2 + 40, BTN_W,
 death_btn_quit_rect = pygame.Rect(WIDTH//2 - BTN_W//2, HEIGHT//2 + 40 + BTN_H + 12, BTN_W, BTN_H)
 
 def draw_pause_menu(mouse_pos):
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0,0,0,200))
-    screen.blit(overlay, (0,0))
-    title = FONT.render("PAUSED", True, WHITE)
+    screen.blit(fill_sprite((WIDTH, HEIGHT), (0,0,0,200)), (0,0))
+    title = render_text("PAUSED", WHITE)
     screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 120))
     mx, my = mouse_pos
     if btn_restart_rect.collidepoint(mx,my):
         pygame.draw.rect(screen, BTN_HOVER, btn_restart_rect, border_radius=8)
     else:
         pygame.draw.rect(screen, BTN_BG, btn_restart_rect, border_radius=8)
-    text = FONT.render("Restart", True, WHITE)
+    text = render_text("Restart", WHITE)
     screen.blit(text, (btn_restart_rect.centerx - text.get_width()//2, btn_restart_rect.centery - text.get_height()//2))
     if btn_quit_rect.collidepoint(mx,my):
         pygame.draw.rect(screen, BTN_HOVER, btn_quit_rect, border_radius=8)
     else:
         pygame.draw.rect(screen, BTN_BG, btn_quit_rect, border_radius=8)
-    text2 = FONT.render("Quit", True, WHITE)
+    text2 = render_text("Quit", WHITE)
     screen.blit(text2, (btn_quit_rect.centerx - text2.get_width()//2, btn_quit_rect.centery - text2.get_height()//2))
 
 def draw_death_menu(mouse_pos):
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0,0,0,220))
-    screen.blit(overlay, (0,0))
+    screen.blit(fill_sprite((WIDTH, HEIGHT), (0,0,0,220)), (0,0))
     
     # Large death message
-    death_font = pygame.font.SysFont("monospace", 48, bold=True)
-    title = death_font.render("YOU DIED", True, RED)
+    title = render_text("YOU DIED", RED, size=48, bold=True)
     screen.blit(title, (WIDTH//2 - title.get_width()//2, HEIGHT//2 - 80))
     
     mx, my = mouse_pos
@@ -914,7 +1095,7 @@ def draw_death_menu(mouse_pos):
         pygame.draw.rect(screen, BTN_HOVER, death_btn_restart_rect, border_radius=8)
     else:
         pygame.draw.rect(screen, BTN_BG, death_btn_restart_rect, border_radius=8)
-    text = FONT.render("Restart", True, WHITE)
+    text = render_text("Restart", WHITE)
     screen.blit(text, (death_btn_restart_rect.centerx - text.get_width()//2, death_btn_restart_rect.centery - text.get_height()//2))
     
     # Quit button
@@ -922,32 +1103,35 @@ def draw_death_menu(mouse_pos):
         pygame.draw.rect(screen, BTN_HOVER, death_btn_quit_rect, border_radius=8)
     else:
         pygame.draw.rect(screen, BTN_BG, death_btn_quit_rect, border_radius=8)
-    text2 = FONT.render("Quit", True, WHITE)
+    text2 = render_text("Quit", WHITE)
     screen.blit(text2, (death_btn_quit_rect.centerx - text2.get_width()//2, death_btn_quit_rect.centery - text2.get_height()//2))
 
 # ---------- Restart helper ----------
 def restart_full():
     global button_pressed
-    player["x"], player["y"] = WORLD_W // 2 + 0.0, WORLD_H // 2 + 0.0
-    player["hp"] = 100; player["attack_cooldown"]=0; player["swipe_timer"]=0
-    player["dodge_timer"]=0; player["dodge_cooldown"]=0; player["invincible"]=0
-    player["afterimages"].clear(); sparks.clear()
+    player.x, player.y = WORLD_W // 2 + 0.0, WORLD_H // 2 + 0.0
+    player.prev_x, player.prev_y = player.x, player.y
+    player.hp = 100; player.attack_cooldown=0; player.swipe_timer=0
+    player.dodge_timer=0; player.dodge_cooldown=0; player.invincible=0
+    player.afterimages.clear(); sparks.clear()
     enemies.clear()
+    pathing.clear()
     for (sx,sy) in spawn_points[:12]:
         enemies.append(create_enemy(sx, sy))
+    reindex_enemies()
     button_pressed = False  # Reset button on restart
 
 # ---------- NPC System (added) ----------
 # NPC images are expected in ./npcs/ (travis.png, biden.png, genesis.png)
 class NPC:
+    __slots__ = ("sprite", "name", "x", "y", "message", "talking", "talk_timer")
+
     def __init__(self, name, image_path, x, y, message):
-        img = load_image(image_path)
-        if img:
-            # scale to a reasonable tile-size sprite
-            self.image = pygame.transform.smoothscale(img, (48, 48))
-        else:
-            self.image = pygame.Surface((48, 48), pygame.SRCALPHA)
-            pygame.draw.rect(self.image, (120,120,200), (0,0,48,48))
+        placeholder = pygame.Surface((48, 48), pygame.SRCALPHA)
+        pygame.draw.rect(placeholder, (120,120,200), (0,0,48,48))
+        # scale to a reasonable tile-size sprite; the placeholder shows until it loads
+        self.sprite = request_image("npc:" + name, image_path, render_size((48, 48)),
+                                    pygame.transform.scale(placeholder, render_size((48, 48))))
         self.name = name
         self.x = x
         self.y = y
@@ -983,30 +1167,56 @@ button_y = WORLD_H // 2 + 200  # Offset down so it doesn't overlap enemies
 button_rect_world = pygame.Rect(button_x - BUTTON_SIZE//2, button_y - BUTTON_SIZE//2, BUTTON_SIZE, BUTTON_SIZE)
 # ---------------------------
 
+for npc in NPCS:
+    interactables.insert(npc, npc.x, npc.y)
+interactables.insert(button_rect_world, button_x, button_y)
+
 # ---------- draw_npcs ----------
 def draw_npcs(target_surf):
     for npc in NPCS:
         sx, sy = world_to_screen(npc.x, npc.y)
-        rect = npc.image.get_rect(center=(sx, sy))
-        target_surf.blit(npc.image, rect)
+        rect = npc.sprite.value.get_rect(center=(sx, sy))
+        target_surf.blit(npc.sprite.value, rect)
+
+# ---------- Asset streaming ----------
+asset_summary_shown = False
+
+def on_screen(wx, wy, margin=64):
+    return (view_x - margin <= wx <= view_x + VIEW_W + margin and
+            view_y - margin <= wy <= view_y + VIEW_H + margin)
+
+def hint_visible_assets():
+    # bump whatever the camera can see right now to the front of the load queue
+    for npc in NPCS:
+        if on_screen(npc.x, npc.y):
+            loader.prioritize(npc.sprite.key, asset_loader.PRIORITY_VISIBLE)
+    n = enemies.n
+    margin = 64
+    ex = enemies.x[:n]; ey = enemies.y[:n]
+    seen = (~enemies.dead[:n] & (ex >= view_x - margin) & (ex <= view_x + VIEW_W + margin) &
+            (ey >= view_y - margin) & (ey <= view_y + VIEW_H + margin))
+    if seen.any():
+        loader.prioritize("enemy", asset_loader.PRIORITY_VISIBLE)
+
+def pump_assets():
+    global asset_summary_shown
+    if not loader.idle():
+        hint_visible_assets()
+    loader.pump()
+    if not asset_summary_shown and loader.idle():
+        print_asset_summary()
+        asset_summary_shown = True
 
 def start_talking_nearest():
     # find nearest NPC within range and start talking
-    best = None
-    best_d = 999999
-    for npc in NPCS:
-        d = math.hypot(player["x"] - npc.x, player["y"] - npc.y)
-        if d < 70 and d < best_d:
-            best = npc
-            best_d = d
+    best = interactables.nearest(player.x, player.y, 70, accept=lambda it: isinstance(it, NPC))
     if best:
         best.talking = True
         best.talk_timer = 180  # ~3 seconds at 60 fps
 
 def stop_talking_if_far():
     for npc in NPCS:
-        d = math.hypot(player["x"] - npc.x, player["y"] - npc.y)
-        if d >= 90:
+        if npc.talking and math.hypot(player.x - npc.x, player.y - npc.y) >= 90:
             npc.talking = False
             npc.talk_timer = 0
 
@@ -1034,14 +1244,12 @@ def draw_dialogue_box():
     if dialog_alpha <= 6:
         return
     box_h = 96
-    overlay = pygame.Surface((WIDTH, box_h), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, int(180 * (dialog_alpha/255.0))))
-    screen.blit(overlay, (0, HEIGHT - box_h))
+    screen.blit(fill_sprite((WIDTH, box_h), (0, 0, 0, int(180 * (dialog_alpha/255.0)))), (0, HEIGHT - box_h))
     if talking_npc:
-        name_text = FONT.render(talking_npc.name + ":", True, (255, 255, 180))
-        msg_text = FONT.render(talking_npc.message, True, WHITE)
+        name_text = render_text(talking_npc.name + ":", (255, 255, 180))
+        msg_text = render_text(talking_npc.message, WHITE)
         # apply overall alpha to texts by rendering to surface and setting alpha
-        text_surf = pygame.Surface((WIDTH - 60, box_h), pygame.SRCALPHA)
+        text_surf = fx_pool.acquire(WIDTH - 60, box_h)
         text_surf.blit(name_text, (0, 20))
         text_surf.blit(msg_text, (name_text.get_width() + 10, 20))
         text_surf.set_alpha(int(dialog_alpha))
@@ -1053,12 +1261,13 @@ def draw_do_not_press_button(target_surf):
         return  # Don't draw if already pressed
     
     # Convert world coords to screen coords
-    btn_screen_x = button_x - camera_x
-    btn_screen_y = button_y - camera_y
+    btn_screen_x, btn_screen_y = world_to_screen(button_x, button_y)
+    size = to_px(BUTTON_SIZE)
+    view_w, view_h = target_surf.get_size()
     
     # Check if button is visible on screen
-    if (btn_screen_x + BUTTON_SIZE//2 < 0 or btn_screen_x - BUTTON_SIZE//2 > VIEW_W or
-        btn_screen_y + BUTTON_SIZE//2 < 0 or btn_screen_y - BUTTON_SIZE//2 > VIEW_H):
+    if (btn_screen_x + size//2 < 0 or btn_screen_x - size//2 > view_w or
+        btn_screen_y + size//2 < 0 or btn_screen_y - size//2 > view_h):
         return
     
     # Draw pulsing button
@@ -1066,20 +1275,19 @@ def draw_do_not_press_button(target_surf):
     btn_color = (200 + int(pulse), 20, 20)
     
     pygame.draw.rect(target_surf, btn_color, 
-                     (int(btn_screen_x - BUTTON_SIZE//2), int(btn_screen_y - BUTTON_SIZE//2), 
-                      BUTTON_SIZE, BUTTON_SIZE), border_radius=12)
+                     (int(btn_screen_x - size//2), int(btn_screen_y - size//2), 
+                      size, size), border_radius=to_px(12))
     pygame.draw.rect(target_surf, (255, 255, 255), 
-                     (int(btn_screen_x - BUTTON_SIZE//2), int(btn_screen_y - BUTTON_SIZE//2), 
-                      BUTTON_SIZE, BUTTON_SIZE), width=3, border_radius=12)
+                     (int(btn_screen_x - size//2), int(btn_screen_y - size//2), 
+                      size, size), width=to_px(3), border_radius=to_px(12))
     
     # Draw text
-    small_font = pygame.font.SysFont("monospace", 14, bold=True)
-    text1 = small_font.render("DO NOT", True, WHITE)
-    text2 = small_font.render("PRESS", True, WHITE)
-    text3 = small_font.render("(Press E)", True, (200, 200, 200))
-    target_surf.blit(text1, (int(btn_screen_x - text1.get_width()//2), int(btn_screen_y - 24)))
-    target_surf.blit(text2, (int(btn_screen_x - text2.get_width()//2), int(btn_screen_y - 4)))
-    target_surf.blit(text3, (int(btn_screen_x - text3.get_width()//2), int(btn_screen_y + 16)))
+    text1 = render_text("DO NOT", WHITE, size=to_px(14), bold=True)
+    text2 = render_text("PRESS", WHITE, size=to_px(14), bold=True)
+    text3 = render_text("(Press E)", (200, 200, 200), size=to_px(14), bold=True)
+    target_surf.blit(text1, (int(btn_screen_x - text1.get_width()//2), int(btn_screen_y - to_px(24))))
+    target_surf.blit(text2, (int(btn_screen_x - text2.get_width()//2), int(btn_screen_y - to_px(4))))
+    target_surf.blit(text3, (int(btn_screen_x - text3.get_width()//2), int(btn_screen_y + to_px(16))))
 
 def check_button_press_with_e():
     global button_pressed
@@ -1087,22 +1295,20 @@ def check_button_press_with_e():
         return
     
     # Check if player is close to button
-    dist = math.hypot(player["x"] - button_x, player["y"] - button_y)
-    if dist < 80:  # Within range to press
+    if interactables.nearest(player.x, player.y, 80, accept=lambda it: it is button_rect_world):
         button_pressed = True
         # Make all enemies HUGE
         for e in enemies:
-            e["radius"] = e["radius"] * random.randint(5, 10)
+            e.radius = e.radius * random.randint(5, 10)
+        sync_enemy_index()
         print("YOU PRESSED THE BUTTON! Enemies are now HUGE!")
 
 # ---------- Help Screen Drawing ----------
 def draw_help_screen():
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 180))
-    screen.blit(overlay, (0, 0))
+    screen.blit(fill_sprite((WIDTH, HEIGHT), (0, 0, 0, 180)), (0, 0))
     
     # Title
-    title_text = FONT.render("Help - Controls", True, WHITE)
+    title_text = render_text("Help - Controls", WHITE)
     screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 50))
     
     # List controls
@@ -1112,10 +1318,11 @@ def draw_help_screen():
         "E: Talk to NPC",
         "Shift: Dodge",
         "Esc: Pause",
-        "H: Toggle Help"
+        "H: Toggle Help",
+        "F3: Frame Profiler"
     ]
     for i, ctrl in enumerate(controls):
-        txt = FONT.render(ctrl, True, WHITE)
+        txt = render_text(ctrl, WHITE)
         screen.blit(txt, (100, 100 + i * 30))
     
     # Button to watch video
@@ -1126,159 +1333,273 @@ def draw_help_screen():
     else:
         pygame.draw.rect(screen, BTN_BG, button_rect, border_radius=8)
     
-    button_text = FONT.render("Watch How to Play", True, WHITE)
+    button_text = render_text("Watch How to Play", WHITE)
     screen.blit(button_text, (button_rect.centerx - button_text.get_width() // 2, button_rect.centery - button_text.get_height() // 2))
     
     return button_rect
 
-# ---------- Main Loop ----------
-paused = False
-running = True
-if len(enemies) == 0:
-    for (sx, sy) in spawn_points[:8]:
-        enemies.append(create_enemy(sx, sy))
-
-while running:
-    ms = clock.tick(60)
-    dt = ms / 1000.0
-    mouse_pos = pygame.mouse.get_pos()
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            # --- Hidden Easter Egg Key Combo ---
-            if event.mod & pygame.KMOD_CTRL and event.key == pygame.K_g:
-                show_secret = not show_secret  # Toggle visibility
-            # -----------------------------------
-            elif event.key == pygame.K_ESCAPE:
-                paused = not paused
-            elif event.key in (pygame.K_LSHIFT, pygame.K_RSHIFT):
-                if not paused and player["dodge_cooldown"] <= 0:
-                    player_dodge_towards_cursor()
-            elif event.key == pygame.K_e:
-                # E pressed: try to start talking to nearest NPC if close, or press button
-                if not paused:
-                    check_button_press_with_e()
-                    start_talking_nearest()
-            elif event.key == pygame.K_h:
-                show_help = not show_help  # Toggle help screen
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:
-                if show_help:
-                    # Check if click on the button
-                    if button_rect.collidepoint(event.pos):
-                        import webbrowser
-                        webbrowser.open("https://drive.google.com/file/d/1LqB9d_72G97QB4cmkfGqXh__8SUoEffE/view?usp=sharing")
-                elif player["hp"] <= 0:
-                    # Death menu clicks
-                    if death_btn_restart_rect.collidepoint(mouse_pos):
-                        restart_full()
-                    elif death_btn_quit_rect.collidepoint(mouse_pos):
-                        pygame.quit()
-                        sys.exit()
-                elif paused:
-                    if btn_restart_rect.collidepoint(mouse_pos):
-                        restart_full()
-                        paused = False
-                    elif btn_quit_rect.collidepoint(mouse_pos):
-                        pygame.quit()
-                        sys.exit()
-                else:
-                    # Perform attack
-                    perform_attack(mouse_pos)
-
-    if not paused and player["hp"] > 0 and not show_help:
-        keys = pygame.key.get_pressed()
-        handle_player_movement(keys)
-        stop_talking_if_far()
-        tick_npc_timers()
-
-        for e in enemies:
-            if not e["dead"]:
-                px_tile = tile_from_world(player["x"], player["y"])
-                if e.get("last_player_tile") != px_tile and e["pf_cooldown"] <= 0:
-                    enemy_request_path(e)
-            update_enemy_ai(e)
-
-        pf_to_do = [e for e in enemies if e.get("pf_request", False) and e["pf_cooldown"] <= 0]
-        random.shuffle(pf_to_do)
-        for e in pf_to_do[:3]:
-            compute_enemy_path(e)
-            e["pf_request"] = False
-
-        if player["attack_cooldown"] > 0: player["attack_cooldown"] -= 1
-        if player["swipe_timer"] > 0: player["swipe_timer"] -= 1
-        if player["dodge_timer"] > 0: player["dodge_timer"] -= 1
-        if player["dodge_cooldown"] > 0: player["dodge_cooldown"] -= 1
-        if player["invincible"] > 0: player["invincible"] -= 1
-
-        for e in list(enemies):
-            if e.get("dead") and e.get("respawn_timer", 0) > 0:
-                e["respawn_timer"] -= 1
-                if e["respawn_timer"] <= 0:
-                    sx, sy = random.choice(spawn_points)
-                    e["x"], e["y"] = sx, sy
-                    e["hp"] = 50; e["dead"] = False; e["fade"]=255; e["sink"]=0; e["death_timer"]=0
-
-        if screen_flash > 0: screen_flash -= 1
-        if player["hp"] <= 0:
-            player["hp"] = 0
-
-        keys = pygame.key.get_pressed()
-        tick_player_anim(dt, keys)
-        for e in enemies:
-            tick_enemy_anim(e, dt)
-
-    update_camera()
-
-    # ---------- Draw ----------
-    world_surface = pygame.Surface((VIEW_W, VIEW_H))
+# ---------- HUD ----------
+hp_label = (None, None)
+
+def hp_text_surface():
+    # only re-rendered when the displayed (integer) HP changes
+    global hp_label
+    hp = int(player.hp)
+    if hp_label[0] != hp:
+        hp_label = (hp, FONT.render(f"HP: {hp}", True, WHITE))
+    return hp_label[1]
+
+# ---------- Render target ----------
+# One world surface reused every frame; in "native" mode the world is drawn
+# straight into the window and there's nothing left to scale.
+if SCALE_MODE == "native":
+    world_surface = screen
+else:
+    world_surface = pygame.Surface((VIEW_W, VIEW_H)).convert()
+
+def present_world(surf):
+    if SCALE_MODE == "smooth":
+        pygame.transform.smoothscale(surf, (WIDTH, HEIGHT), screen)
+    elif SCALE_MODE == "nearest":
+        pygame.transform.scale(surf, (WIDTH, HEIGHT), screen)
+
+# ---------- Frame profiler ----------
+# F3 toggles the overlay; the trace is written to .profile/ when the game exits
+PROFILE_PHASES = ["events", "player", "enemy_ai", "pathfinding", "animation",
+                  "draw_world", "draw_enemies", "draw_sparks", "smoothscale", "flip"]
+frame_profiler = profiler.FrameProfiler(PROFILE_PHASES)
+show_profiler = False
+profiler_overlay = None
+PROFILER_REFRESH = 30  # frames between overlay re-renders
+path_stats_mark = (time.perf_counter(), 0)  # (when, pathing.searches) at the last re-render
+
+def draw_profiler_overlay():
+    global profiler_overlay, path_stats_mark
+    if profiler_overlay is None or frame_profiler.frame_no % PROFILER_REFRESH == 0:
+        rows = [f"{'phase':<13}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for name in frame_profiler.columns:
+            p50, p95, p99 = frame_profiler.percentiles(name)
+            rows.append(f"{name:<13}{p50:>7.2f}{p95:>7.2f}{p99:>7.2f}")
+        now = time.perf_counter()
+        then, searches = path_stats_mark
+        rate = (pathing.searches - searches) / (now - then) if now > then else 0.0
+        path_stats_mark = (now, pathing.searches)
+        rows.append(f"path cache {pathing.cache.hit_rate() * 100:5.1f}% hit  {len(pathing.cache)} paths")
+        rows.append(f"searches/s {rate:7.1f}")
+        rows.append("AI full/coarse/dormant " + "/".join(str(c) for c in lod_counts))
+        if ai_worker_pool is not None:
+            rows.append(f"AI workers {len(ai_worker_pool)}, {ai_worker_pool.parts} runs")
+        font = get_font("monospace", 14)
+        line_h = font.get_linesize()
+        surf = pygame.Surface((max(font.size(r)[0] for r in rows) + 12, line_h * len(rows) + 8), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            surf.blit(font.render(row, True, WHITE), (6, 4 + i * line_h))
+        profiler_overlay = surf
+    screen.blit(profiler_overlay, (WIDTH - profiler_overlay.get_width() - 10, 10))
+
+def dump_frame_profile():
+    path = frame_profiler.dump()
+    if path:
+        print(f"Frame profile written to {path}")
+
+# ---------- Scene drawing ----------
+# world, HUD and dialogue; menus and overlays are drawn on top by the main loop
+def draw_scene(keys):
     world_surface.fill(BLACK)
 
-    draw_world(world_surface)
+    with frame_profiler.phase("draw_world"):
+        draw_world(world_surface)
     draw_afterimages(world_surface)
     # Draw DO NOT PRESS button behind everything
     draw_do_not_press_button(world_surface)
-    draw_enemies(world_surface, dt)
+    with frame_profiler.phase("draw_enemies"):
+        draw_enemies(world_surface)
     # draw NPCs into world surface so they are affected by camera/zoom
     draw_npcs(world_surface)
-    draw_player(world_surface, pygame.key.get_pressed())
-    draw_sparks_and_flash(world_surface)
+    draw_player(world_surface, keys)
+    with frame_profiler.phase("draw_sparks"):
+        draw_sparks_and_flash(world_surface)
 
-    scaled = pygame.transform.smoothscale(world_surface, (WIDTH, HEIGHT))
-    screen.blit(scaled, (0, 0))
+    with frame_profiler.phase("smoothscale"):
+        present_world(world_surface)
 
     # HUD (screen coords)
     pygame.draw.rect(screen, (120, 0, 0), (18, 18, 204, 18))
-    pygame.draw.rect(screen, RED, (18, 18, 204 * max(0.0, player["hp"] / 100.0), 18))
-    hp_text = FONT.render(f"HP: {int(player['hp'])}", True, WHITE)
-    screen.blit(hp_text, (230, 14))
+    pygame.draw.rect(screen, RED, (18, 18, 204 * max(0.0, player.hp / 100.0), 18))
+    screen.blit(hp_text_surface(), (230, 14))
 
     # draw dialogue box on top of everything (handles its own fade)
     draw_dialogue_box()
 
-    # Draw pause menu if paused
-    if paused:
-        draw_pause_menu(mouse_pos)
-
-    # Draw help screen if toggled
-    if show_help:
-        button_rect = draw_help_screen()
-
-    # Draw death menu if dead
-    if player["hp"] <= 0:
-        draw_death_menu(mouse_pos)
-
-    # --- Draw Secret Message (Easter Egg) ---
-    if show_secret:
-        y = 300
-        for line in secret_text.split("\n"):
-            text_surface = font.render(line, True, (150, 255, 180))
-            screen.blit(text_surface, (80, y))
-            y += 30
-    # ----------------------------------------
-
-    pygame.display.flip()
+# ---------- Simulation step ----------
+# Gameplay advances in fixed SIM_DT ticks; every timer counts these ticks.
+# simulate_tick touches no display state, so it can be driven directly
+# (faster than real time) for soak tests and AI tuning.
+SIM_HZ = 60
+SIM_DT = 1.0 / SIM_HZ
+MAX_FPS = 120
+# longest frame the accumulator will absorb; beyond this the game slows down
+# instead of trying to catch up on hundreds of ticks
+MAX_FRAME_TIME = 0.25
+
+def snapshot_positions():
+    global prev_camera_x, prev_camera_y
+    player.prev_x, player.prev_y = player.x, player.y
+    n = enemies.n
+    enemies.prev_x[:n] = enemies.x[:n]
+    enemies.prev_y[:n] = enemies.y[:n]
+    prev_camera_x, prev_camera_y = camera_x, camera_y
+
+def simulate_tick(keys):
+    global screen_flash
+    snapshot_positions()
+    with frame_profiler.phase("player"):
+        handle_player_movement(keys)
+    if world.follow(*tile_from_world(player.x, player.y)):
+        on_world_moved()
+    stop_talking_if_far()
+    tick_npc_timers()
+
+    with frame_profiler.phase("enemy_ai"):
+        update_lod()
+    with frame_profiler.phase("pathfinding"):
+        request_stale_paths()
+    with frame_profiler.phase("enemy_ai"):
+        update_enemy_ai()
+    with frame_profiler.phase("pathfinding"):
+        service_path_requests()
+
+    if player.attack_cooldown > 0: player.attack_cooldown -= 1
+    if player.swipe_timer > 0: player.swipe_timer -= 1
+    if player.dodge_timer > 0: player.dodge_timer -= 1
+    if player.dodge_cooldown > 0: player.dodge_cooldown -= 1
+    if player.invincible > 0: player.invincible -= 1
+
+    tick_respawns()
+    sync_enemy_index()
+    tick_sparks()
+
+    if screen_flash > 0: screen_flash -= 1
+    if player.hp <= 0:
+        player.hp = 0
+
+    with frame_profiler.phase("animation"):
+        tick_player_anim(SIM_DT, keys)
+        tick_enemy_anim(SIM_DT)
+    update_camera()
 
-pygame.quit()
-sys.exit()
\ No newline at end of file
+# ---------- Main Loop ----------
+def main():
+    global show_secret, show_help, show_profiler
+    atexit.register(dump_frame_profile)
+    paused = False
+    running = True
+    button_rect = None
+    if len(enemies) == 0:
+        for (sx, sy) in spawn_points[:8]:
+            enemies.append(create_enemy(sx, sy))
+        reindex_enemies()
+
+    accumulator = 0.0
+    while running:
+        frame_time = min(clock.tick(MAX_FPS) / 1000.0, MAX_FRAME_TIME)
+        frame_profiler.begin_frame()
+        pump_assets()
+        with frame_profiler.phase("events"):
+            mouse_pos = pygame.mouse.get_pos()
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    # --- Hidden Easter Egg Key Combo ---
+                    if event.mod & pygame.KMOD_CTRL and event.key == pygame.K_g:
+                        show_secret = not show_secret  # Toggle visibility
+                    # -----------------------------------
+                    elif event.key == pygame.K_ESCAPE:
+                        paused = not paused
+                    elif event.key in (pygame.K_LSHIFT, pygame.K_RSHIFT):
+                        if not paused and player.dodge_cooldown <= 0:
+                            player_dodge_towards_cursor()
+                    elif event.key == pygame.K_e:
+                        # E pressed: try to start talking to nearest NPC if close, or press button
+                        if not paused:
+                            check_button_press_with_e()
+                            start_talking_nearest()
+                    elif event.key == pygame.K_h:
+                        show_help = not show_help  # Toggle help screen
+                    elif event.key == pygame.K_F3:
+                        show_profiler = not show_profiler
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button == 1:
+                        if show_help:
+                            # Check if click on the button
+                            if button_rect.collidepoint(event.pos):
+                                import webbrowser
+                                webbrowser.open("https://drive.google.com/file/d/1LqB9d_72G97QB4cmkfGqXh__8SUoEffE/view?usp=sharing")
+                        elif player.hp <= 0:
+                            # Death menu clicks
+                            if death_btn_restart_rect.collidepoint(mouse_pos):
+                                restart_full()
+                            elif death_btn_quit_rect.collidepoint(mouse_pos):
+                                pygame.quit()
+                                sys.exit()
+                        elif paused:
+                            if btn_restart_rect.collidepoint(mouse_pos):
+                                restart_full()
+                                paused = False
+                            elif btn_quit_rect.collidepoint(mouse_pos):
+                                pygame.quit()
+                                sys.exit()
+                        else:
+                            # Perform attack
+                            perform_attack(mouse_pos)
+
+        if not paused and player.hp > 0 and not show_help:
+            keys = pygame.key.get_pressed()
+            accumulator += frame_time
+            while accumulator >= SIM_DT:
+                simulate_tick(keys)
+                accumulator -= SIM_DT
+            begin_render(accumulator / SIM_DT)
+        else:
+            accumulator = 0.0
+            begin_render(1.0)
+
+        # ---------- Draw ----------
+        draw_scene(pygame.key.get_pressed())
+
+        # Draw pause menu if paused
+        if paused:
+            draw_pause_menu(mouse_pos)
+
+        # Draw help screen if toggled
+        if show_help:
+            button_rect = draw_help_screen()
+
+        # Draw death menu if dead
+        if player.hp <= 0:
+            draw_death_menu(mouse_pos)
+
+        # --- Draw Secret Message (Easter Egg) ---
+        if show_secret:
+            y = 300
+            for line in secret_text.split("\n"):
+                text_surface = render_text(line, (150, 255, 180), "consolas", 22)
+                screen.blit(text_surface, (80, y))
+                y += 30
+        # ----------------------------------------
+
+        if show_profiler:
+            draw_profiler_overlay()
+
+        with frame_profiler.phase("flip"):
+            pygame.display.flip()
+        fx_pool.end_frame()
+        frame_profiler.end_frame()
+
+    pygame.quit()
+    sys.exit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+# Seeded map generator. Same layout rules the game has always used (a wide
+# horizontal spine, broken vertical columns every 12 tiles, a central plaza,
+# rooms hooked onto the nearest corridor) but carved with numpy slices and
+# vectorised random masks, so a given (seed, size) always gives the same map
+# and 1000x1000+ maps take well under a second. Larger maps get more spines
+# and proportionally more rooms.
+#
+# generate_region() carves any window of a (possibly huge) map on its own,
+# for streaming it in chunks: column noise and rooms are seeded per
+# ROOM_CELL x ROOM_CELL cell rather than drawn from one sequence, so a tile
+# comes out the same whichever window it is generated in. (It is its own
+# layout: generate() and generate_region() with the same seed differ.)
+
+import numpy as np
+import grid
+
+COLUMN_SPACING = 12
+SPINE_SPACING = 48
+TILES_PER_ROOM = 288   # 60x48 -> 10 rooms
+MIN_SIZE = 20
+ROOM_CELL = 64
+# how far a cell's rooms (and their link corridors) can reach past the cell
+ROOM_REACH = SPINE_SPACING + 8
+
+# MapInfo.room_link values
+LINK_NONE = 0
+LINK_COLUMN = 1   # horizontal corridor to the nearest column
+LINK_SPINE = 2    # vertical corridor to the nearest spine
+
+class MapInfo:
+    # what was carved where; rects are (x, y, w, h) in tiles
+    def __init__(self, seed, width, height):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.plaza = None
+        self.spines = []       # centre row of each 5-tall horizontal corridor
+        self.columns = []      # x of each vertical column
+        self.rooms = np.zeros((0, 4), dtype=np.int32)
+        self.room_link = np.zeros(0, dtype=np.int8)
+        self.link_target = np.zeros(0, dtype=np.int32)   # column x / spine row
+
+def spine_rows(height):
+    # centre rows of the horizontal spines: the middle row, then every SPINE_SPACING
+    return [y for y in range(height // 2 % SPINE_SPACING, height, SPINE_SPACING) if 2 <= y < height - 2]
+
+def generate(width, height, seed=None, column_fill=0.85, room_fill=0.95, link_chance=0.9,
+             rooms=None):
+    # returns (grid.Grid, MapInfo); seed=None draws a fresh one (kept in info.seed)
+    if width < MIN_SIZE or height < MIN_SIZE:
+        raise ValueError(f"map must be at least {MIN_SIZE}x{MIN_SIZE} tiles")
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (1 << 63))
+    rng = np.random.default_rng(seed)
+    info = MapInfo(seed, width, height)
+    world = grid.Grid(width, height)
+    cells = world.cells()
+    floor = grid.FLOOR_CODE
+
+    # spines: one through the middle, more every SPINE_SPACING rows
+    info.spines = spine_rows(height)
+    for y in info.spines:
+        cells[y - 2:y + 3, 2:width - 2] = floor
+
+    # columns, each tile carved with probability column_fill
+    xs = np.arange(6, width - 6, COLUMN_SPACING)
+    info.columns = xs.tolist()
+    top, bottom = 3, height - 4
+    if len(xs) and bottom > top:
+        col = cells[top:bottom, xs]
+        col[rng.random(col.shape) < column_fill] = floor
+        cells[top:bottom, xs] = col
+
+    # plaza
+    cx, cy = width // 2, height // 2
+    info.plaza = (max(0, cx - 8), max(0, cy - 6), 17, 13)
+    cells[max(0, cy - 6):cy + 7, max(0, cx - 8):cx + 9] = floor
+
+    # rooms
+    n = rooms if rooms is not None else max(1, round(width * height / TILES_PER_ROOM))
+    rw = rng.integers(3, 8, n)
+    rh = rng.integers(3, 7, n)
+    rx = rng.integers(3, width - rw - 2)
+    ry = rng.integers(3, height - rh - 2)
+    link = np.where(rng.random(n) < link_chance,
+                    np.where(rng.random(n) < 0.5, LINK_COLUMN, LINK_SPINE), LINK_NONE).astype(np.int8)
+    mid_x = rx + rw // 2
+    mid_row = ry + rh // 2
+    target = np.zeros(n, dtype=np.int32)
+    if len(xs):
+        target = np.where(link == LINK_COLUMN, xs[np.abs(mid_x[:, None] - xs[None, :]).argmin(axis=1)], target)
+    else:
+        link[link == LINK_COLUMN] = LINK_SPINE
+    spines = np.array(info.spines)
+    target = np.where(link == LINK_SPINE, spines[np.abs(mid_row[:, None] - spines[None, :]).argmin(axis=1)], target)
+    holes = rng.random((n, 6, 7)) >= room_fill
+    for k in range(n):
+        x, y, w, h = int(rx[k]), int(ry[k]), int(rw[k]), int(rh[k])
+        block = cells[y:y + h, x:x + w]
+        block[~holes[k, :h, :w]] = floor
+        t = int(target[k])
+        if link[k] == LINK_COLUMN:
+            sx, sy = int(mid_x[k]), int(mid_row[k])
+            cells[max(0, sy - 1):sy + 2, min(sx, t):max(sx, t) + 1] = floor
+        elif link[k] == LINK_SPINE:
+            sx, sy = int(mid_x[k]), int(mid_row[k])
+            cells[min(sy, t):max(sy, t) + 1, max(0, sx - 1):sx + 2] = floor
+    info.rooms = np.stack([rx, ry, rw, rh], axis=1).astype(np.int32)
+    info.room_link = link
+    info.link_target = target
+
+    cells[0, :] = grid.WALL_CODE
+    cells[-1, :] = grid.WALL_CODE
+    cells[:, 0] = grid.WALL_CODE
+    cells[:, -1] = grid.WALL_CODE
+    world.rebuild_masks()
+    return world, info
+
+def _cell_rng(seed, cx, cy, stream):
+    return np.random.default_rng([seed, cx, cy, stream])
+
+def generate_region(width, height, seed, x0, y0, w, h, column_fill=0.85, room_fill=0.95,
+                    link_chance=0.9):
+    # tile codes (h, w) for the window at (x0, y0) of a width x height map;
+    # anything outside the map is wall
+    floor = grid.FLOOR_CODE
+    out = np.full((h, w), grid.WALL_CODE, dtype=np.uint8)
+    x1, y1 = x0 + w, y0 + h
+
+    def carve(ax, ay, bx, by):
+        # floor over [ax, bx) x [ay, by) in map tiles, clipped to the window and the map
+        ax, ay = max(ax, x0, 0), max(ay, y0, 0)
+        bx, by = min(bx, x1, width), min(by, y1, height)
+        if ax < bx and ay < by:
+            out[ay - y0:by - y0, ax - x0:bx - x0] = floor
+
+    for y in spine_rows(height):
+        carve(2, y - 2, width - 2, y + 3)
+
+    cells_x = range(max(0, x0 // ROOM_CELL), min(width - 1, x1 - 1) // ROOM_CELL + 1)
+    cells_y = range(max(0, y0 // ROOM_CELL), min(height - 1, y1 - 1) // ROOM_CELL + 1)
+    xs = np.arange(6, width - 6, COLUMN_SPACING)
+    top, bottom = 3, height - 4
+    for cy in cells_y:
+        for cx in cells_x:
+            # column tiles in this cell, each kept with probability column_fill
+            bx, by = cx * ROOM_CELL, cy * ROOM_CELL
+            keep = _cell_rng(seed, cx, cy, 0).random((ROOM_CELL, ROOM_CELL)) < column_fill
+            cols = xs[(xs >= max(bx, x0)) & (xs < min(bx + ROOM_CELL, x1))]
+            ry0, ry1 = max(by, y0, top), min(by + ROOM_CELL, y1, bottom)
+            if len(cols) and ry0 < ry1:
+                sub = keep[ry0 - by:ry1 - by][:, cols - bx]
+                block = out[ry0 - y0:ry1 - y0][:, cols - x0]
+                block[sub] = floor
+                out[ry0 - y0:ry1 - y0, cols - x0] = block
+
+    cx, cy = width // 2, height // 2
+    carve(cx - 8, cy - 6, cx + 9, cy + 7)
+
+    # rooms: every cell close enough for its rooms or corridors to reach the window
+    spines = np.array(spine_rows(height))
+    per_cell = max(1, round(ROOM_CELL * ROOM_CELL / TILES_PER_ROOM))
+    for cy in range(max(0, (y0 - ROOM_REACH) // ROOM_CELL), min(height - 1, y1 + ROOM_REACH) // ROOM_CELL + 1):
+        for cx in range(max(0, (x0 - ROOM_REACH) // ROOM_CELL), min(width - 1, x1 + ROOM_REACH) // ROOM_CELL + 1):
+            rng = _cell_rng(seed, cx, cy, 1)
+            rw = rng.integers(3, 8, per_cell)
+            rh = rng.integers(3, 7, per_cell)
+            rx = np.clip(cx * ROOM_CELL + rng.integers(0, ROOM_CELL, per_cell), 3, width - rw - 3)
+            ry = np.clip(cy * ROOM_CELL + rng.integers(0, ROOM_CELL, per_cell), 3, height - rh - 3)
+            linked = rng.random(per_cell) < link_chance
+            to_column = rng.random(per_cell) < 0.5
+            holes = rng.random((per_cell, 6, 7)) >= room_fill
+            for k in range(per_cell):
+                x, y, rw_k, rh_k = int(rx[k]), int(ry[k]), int(rw[k]), int(rh[k])
+                sx, sy = x + rw_k // 2, y + rh_k // 2
+                if x < x1 and y < y1 and x + rw_k > x0 and y + rh_k > y0:
+                    ax, ay = max(x, x0), max(y, y0)
+                    bx, by = min(x + rw_k, x1), min(y + rh_k, y1)
+                    block = out[ay - y0:by - y0, ax - x0:bx - x0]
+                    block[~holes[k, ay - y:by - y, ax - x:bx - x]] = floor
+                if not linked[k]:
+                    continue
+                if to_column[k] and len(xs):
+                    t = int(xs[np.abs(xs - sx).argmin()])
+                    carve(min(sx, t), sy - 1, max(sx, t) + 1, sy + 2)
+                else:
+                    t = int(spines[np.abs(spines - sy).argmin()])
+                    carve(sx - 1, min(sy, t), sx + 2, max(sy, t) + 1)
+
+    # map border
+    for bx0, by0, bx1, by1 in ((0, 0, width, 1), (0, height - 1, width, height),
+                               (0, 0, 1, height), (width - 1, 0, width, height)):
+        ax, ay = max(bx0, x0), max(by0, y0)
+        bx, by = min(bx1, x1), min(by1, y1)
+        if ax < bx and ay < by:
+            out[ay - y0:by - y0, ax - x0:bx - x0] = grid.WALL_CODE
+    return out
@@ -0,0 +1,85 @@
+# LRU cache of finished paths keyed by (start, goal). Every tile of a cached
+# path is indexed as well, so a request from any tile already on a path to the
+# same goal is answered with that path's suffix, and a search that reaches
+# such a tile can stop there and join it (see PathScheduler). Any change to
+# the grid clears the cache.
+
+from collections import OrderedDict
+
+class PathCache:
+    def __init__(self, grid, capacity=256):
+        self.grid = grid
+        self.capacity = capacity
+        self.version = grid.version
+        self.entries = OrderedDict()
+        # (tile, goal) -> {entry key: index of tile in that entry's path}, for
+        # every cached entry through the tile; the oldest one answers lookups
+        self.on_path = {}
+        self.hits = 0
+        self.suffix_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _check_version(self):
+        if self.version != self.grid.version:
+            self.entries.clear()
+            self.on_path.clear()
+            self.version = self.grid.version
+
+    def clear(self):
+        self.entries.clear()
+        self.on_path.clear()
+
+    def suffix(self, tile, goal):
+        # cached path from `tile` to `goal`, or None; does not touch the stats
+        self._check_version()
+        refs = self.on_path.get((tile, goal))
+        if refs is None:
+            return None
+        key, index = next(iter(refs.items()))
+        self.entries.move_to_end(key)
+        path = self.entries[key]
+        return path if index == 0 else path[index:]
+
+    def get(self, start, goal):
+        path = self.suffix(start, goal)
+        if path is None:
+            self.misses += 1
+        elif (start, goal) in self.entries:
+            self.hits += 1
+        else:
+            self.suffix_hits += 1
+        return path
+
+    def put(self, start, goal, path):
+        if not path:
+            return
+        self._check_version()
+        key = (start, goal)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return
+        self.entries[key] = path
+        on_path = self.on_path
+        for index, tile in enumerate(path):
+            on_path.setdefault((tile, goal), {}).setdefault(key, index)
+        while len(self.entries) > self.capacity:
+            old_key, old_path = self.entries.popitem(last=False)
+            goal_old = old_key[1]
+            for tile in old_path:
+                refs = on_path.get((tile, goal_old))
+                if refs is not None:
+                    refs.pop(old_key, None)
+                    if not refs:
+                        del on_path[(tile, goal_old)]
+
+    def hit_rate(self):
+        total = self.hits + self.suffix_hits + self.misses
+        return (self.hits + self.suffix_hits) / total if total else 0.0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.suffix_hits = 0
+        self.misses = 0
@@ -0,0 +1,224 @@
+# Budgeted path scheduler. Every path request goes through here and is served
+# in priority order until the per-tick budget is spent; whatever is left waits
+# for the next tick. The budget counts work, not time: tiles expanded by A* or
+# settled by the flow field BFS, tiles walked off the field, one unit per
+# cache hit or rejection. So the same game state always gets the same paths
+# on the same tick, whatever the machine; budget_us adds an optional
+# wall-clock cap on top (which gives that up). Requests with goal=None follow the shared flow
+# field (whose BFS is itself built in slices) and read their path off it;
+# requests with an explicit goal run a resumable A* that can pause mid-search.
+# While a new field is being built the old one keeps answering (paths lead to
+# the player's previous tile): the build gets build_share of the budget and
+# requests the rest, and a build in progress is only restarted once the goal
+# has moved regoal tiles away from it, so a moving player can't starve it.
+# Finished paths go into a PathCache, and both kinds of search stop early when
+# they reach a tile that already has a cached path to their goal. A request
+# whose start and goal lie in different connected components gets [] without
+# any search.
+
+import time, heapq
+import pathfinding, connectivity
+from path_cache import PathCache
+
+# expansions between deadline checks
+SLICE = 64
+
+class PathRequest:
+    __slots__ = ("key", "start", "goal", "search")
+
+    def __init__(self, key, start, goal):
+        self.key = key
+        self.start = start
+        self.goal = goal
+        self.search = None
+
+class PathScheduler:
+    def __init__(self, grid, budget=1000, budget_us=None, aging=0.5, cache_size=256, jps=False,
+                 components=None, build_share=0.5, regoal=8):
+        self.grid = grid
+        self.components = components or connectivity.Components(grid)
+        # explicit-goal searches use jump point search; off by default, it only
+        # beats plain A* on narrow corridor maps (see AStarSearch)
+        self.jps = jps
+        self.cache = PathCache(grid, cache_size)
+        # work units per tick, and the optional time cap in seconds
+        self.budget = budget
+        self.budget_s = budget_us / 1e6 if budget_us else None
+        self.left = 0
+        self.deadline = None
+        # priority points a request gains per tick spent waiting
+        self.aging = aging
+        self.tick = 0
+        self.heap = []
+        self.requests = {}
+        self.seq = 0
+        self.field = None
+        self.next_field = None
+        self.build_share = build_share
+        self.regoal = regoal
+        # stats since the last reset_stats(); searches = field walks + A* runs
+        # that were not answered straight from the cache
+        self.served = 0
+        self.searches = 0
+        self.rejected = 0
+        self.ticks_over_budget = 0
+        self.fields_built = 0
+        self.fields_dropped = 0
+
+    def __len__(self):
+        return len(self.requests)
+
+    def __contains__(self, key):
+        return key in self.requests
+
+    def set_goal(self, goal):
+        # start (re)building the shared field when the goal moves or the map changes
+        version = self.grid.version
+        if self.field_ready(goal):
+            self.next_field = None
+            return
+        nf = self.next_field
+        if nf is not None:
+            if nf.version == version and pathfinding.heuristic(nf.goal, goal) < self.regoal:
+                return
+            self.fields_dropped += 1
+        self.next_field = pathfinding.FlowField(self.grid, goal, build=False)
+
+    def field_ready(self, goal):
+        field = self.field
+        return field is not None and field.goal == goal and field.version == self.grid.version
+
+    def submit(self, key, start, goal, priority):
+        # lower priority is served first; re-submitting a queued key only
+        # updates where it is going, it keeps its place in line
+        req = self.requests.get(key)
+        if req is not None:
+            if req.start != start or req.goal != goal:
+                req.start = start
+                req.goal = goal
+                req.search = None
+            return
+        # aging folded into the key: a request that has waited k ticks longer
+        # beats one that is up to aging * k priority points better
+        order = priority + self.aging * self.tick
+        req = PathRequest(key, start, goal)
+        self.requests[key] = req
+        self.seq += 1
+        heapq.heappush(self.heap, (order, self.seq, req))
+
+    def cancel(self, key):
+        self.requests.pop(key, None)
+
+    def clear(self):
+        self.heap.clear()
+        self.requests.clear()
+        self.cache.clear()
+
+    def run(self):
+        # spend up to the budget; returns [(key, goal, path)] for finished requests
+        self.tick += 1
+        self.left = self.budget
+        self.deadline = time.perf_counter() + self.budget_s if self.budget_s else None
+        done = []
+        over = False
+        nf = self.next_field
+        if nf is not None:
+            # hold back the requests' share while the old field can still answer them
+            field = self.field
+            reserve = 0
+            if field is not None and field.version == self.grid.version:
+                reserve = self.budget - int(self.budget * self.build_share)
+            self.left -= reserve
+            if self.advance(nf, nf.expand):
+                self.field = nf
+                self.next_field = None
+                self.fields_built += 1
+            else:
+                over = True
+            self.left += reserve
+        heap = self.heap
+        requests = self.requests
+        while heap:
+            _, _, req = heap[0]
+            if requests.get(req.key) is not req:
+                heapq.heappop(heap)
+                continue
+            if not self.serve(req):
+                over = True
+                break
+            heapq.heappop(heap)
+            del requests[req.key]
+            search = req.search
+            if not isinstance(search, Finished):
+                self.cache.put(req.start, search.goal, search.path)
+            done.append((req.key, search.goal, search.path))
+            self.served += 1
+            if self.spent():
+                break
+        if over:
+            self.ticks_over_budget += 1
+        return done
+
+    def spent(self):
+        return self.left <= 0 or (self.deadline is not None and time.perf_counter() >= self.deadline)
+
+    def advance(self, job, step):
+        # step(n) expands up to n more tiles of job (a FlowField or AStarSearch);
+        # run it slice by slice until it returns True, or False once the budget is spent
+        while True:
+            if self.spent():
+                return False
+            before = job.expanded
+            finished = step(min(SLICE, self.left))
+            self.left -= max(job.expanded - before, 1)
+            if finished:
+                return True
+
+    def serve(self, req):
+        # advance one request; True once its path is known
+        field = self.field
+        goal = req.goal
+        if goal is None:
+            if field is None or field.version != self.grid.version:
+                return False
+            goal = field.goal
+        search = req.search
+        if search is None or search.version != self.grid.version:
+            self.left -= 1
+            if not self.components.connected(req.start, goal):
+                req.search = Finished(goal, [], self.grid.version)
+                self.rejected += 1
+                return True
+            cache = self.cache
+            path = cache.get(req.start, goal)
+            if path is not None:
+                req.search = Finished(goal, path, self.grid.version)
+                return True
+            self.searches += 1
+            join = lambda tile: cache.suffix(tile, goal)
+            if self.field_ready(goal):
+                req.search = Finished(goal, field.path_from(req.start, join), field.version)
+                self.left -= len(req.search.path)
+                cache.put(req.start, goal, req.search.path)
+                return True
+            search = req.search = pathfinding.AStarSearch(self.grid, req.start, goal, join, self.jps)
+        return self.advance(search, search.step)
+
+    def reset_stats(self):
+        self.served = 0
+        self.searches = 0
+        self.rejected = 0
+        self.ticks_over_budget = 0
+        self.fields_built = 0
+        self.fields_dropped = 0
+        self.cache.reset_stats()
+
+class Finished:
+    # a request answered without an A* search (cache hit, flow-field walk or
+    # unreachable goal)
+    __slots__ = ("goal", "path", "version")
+
+    def __init__(self, goal, path, version):
+        self.goal = goal
+        self.path = path
+        self.version = version
@@ -0,0 +1,348 @@
+# Grid pathfinding: A* between two tiles, plus a flow field (BFS distance
+# map) that answers "next step towards the goal" for every tile at once, so
+# many enemies chasing the same target share one search. Both can be run in
+# slices (AStarSearch.step / FlowField.expand) so a scheduler can spread a
+# search over several frames.
+
+import heapq, weakref
+from collections import deque
+from grid import STEPS
+
+def neighbors(grid, tile):
+    tx, ty = tile
+    mask = grid.nbr[ty * grid.w + tx]
+    for bit, (dx, dy) in enumerate(STEPS):
+        if mask & (1 << bit):
+            yield (tx + dx, ty + dy)
+
+def heuristic(a, b):
+    return abs(a[0]-b[0]) + abs(a[1]-b[1])
+
+class SearchSpace:
+    # Scratch arrays for A*, indexed by flat tile id and reused from search to
+    # search. An entry only counts when its stamp matches the current
+    # generation, so starting a search is O(1) instead of clearing w*h entries.
+    def __init__(self, size):
+        self.g = [0] * size
+        self.parent = [-1] * size
+        self.seen = [0] * size
+        self.closed = [0] * size
+        self.generation = 0
+        self.owner = None
+
+    def free(self):
+        owner = self.owner and self.owner()
+        return owner is None or owner.path is not None
+
+# grid -> [SearchSpace]; a search holds its space until it finishes (or is
+# dropped), so paused searches never clobber each other and the pool only
+# grows to the number of searches in flight at once
+_spaces = weakref.WeakKeyDictionary()
+
+def acquire_space(grid, owner):
+    size = grid.w * grid.h
+    spaces = _spaces.get(grid)
+    if spaces is None:
+        spaces = _spaces[grid] = []
+    for space in spaces:
+        if len(space.g) == size and space.free():
+            break
+    else:
+        spaces[:] = [sp for sp in spaces if len(sp.g) == size]
+        space = SearchSpace(size)
+        spaces.append(space)
+    space.generation += 1
+    space.owner = weakref.ref(owner)
+    return space
+
+# neighbour-mask bit for each STEPS direction: +x, -x, +y, -y
+BITS = (1, 2, 4, 8)
+
+class AStarSearch:
+    # A* over flat tile ids that can stop after any number of expansions and
+    # pick up where it left off; run step() until it returns True, then read
+    # .path ([start, ..., goal], or [] if unreachable). The open heap holds
+    # packed ints (f, h, id): equal-f ties go to the node nearest the goal,
+    # then the lowest id, so the same query always gives the same path. (The
+    # tuple A* before this ordered its heap by (f, (x, y)), lowest x first;
+    # preferring small h finishes along one route instead of widening every
+    # tied one, which is most of the saving on open floor. Path lengths are
+    # unchanged, but where several shortest routes exist the tiles can differ.)
+    # jps=True runs Jump Point Search (4-connected): it skips along runs of
+    # floor and only expands turning points; the jump points are filled back
+    # in, so paths have the same length (ties can pick a different route).
+    # Every tile a jump scans counts in .expanded, like an A* expansion.
+    # Each jump scans tile by tile in Python, so it only wins where a few
+    # expansions replace many: narrow rooms-and-corridors maps (10-20% faster
+    # than plain A* in bench_astar.py). On open floor, clutter and the game's
+    # own mapgen layout (wide spines, broken columns) it is slower, which is
+    # why the scheduler defaults to plain A*.
+    # join(tile) works as in FlowField.path_from: the search ends at the first
+    # expanded tile with a known path to the goal (which can cost a few steps
+    # over the optimum).
+    def __init__(self, grid, start, goal, join=None, jps=False):
+        self.grid = grid
+        self.join = join
+        self.jps = jps
+        self.start = start
+        self.goal = goal
+        self.version = grid.version
+        self.path = None
+        self.expanded = 0
+        self.w = grid.w
+        self.nbr = grid.nbr
+        self.offsets = grid.offsets
+        self.start_i = start[1] * grid.w + start[0]
+        self.goal_i = goal[1] * grid.w + goal[0]
+        self.id_bits = (grid.w * grid.h).bit_length()
+        self.h_bits = (grid.w + grid.h).bit_length()
+        self.space = None
+        self.gen = 0
+        self.open_set = None
+        if start == goal:
+            self.path = [start]
+        elif grid.is_wall(*goal):
+            self.path = []
+
+    @property
+    def done(self):
+        return self.path is not None
+
+    def _push(self, i, g):
+        w = self.w
+        h = abs(i % w - self.goal[0]) + abs(i // w - self.goal[1])
+        heapq.heappush(self.open_set, ((((g + h) << self.h_bits) | h) << self.id_bits) | i)
+
+    def _begin(self):
+        space = self.space = acquire_space(self.grid, self)
+        gen = self.gen = space.generation
+        s = self.start_i
+        space.seen[s] = gen
+        space.g[s] = 0
+        space.parent[s] = -1
+        self.open_set = []
+        self._push(s, 0)
+
+    def step(self, max_expansions):
+        if self.path is not None:
+            return True
+        if self.space is None:
+            self._begin()
+        space = self.space
+        g = space.g
+        parent = space.parent
+        seen = space.seen
+        closed = space.closed
+        gen = self.gen
+        open_set = self.open_set
+        id_mask = (1 << self.id_bits) - 1
+        goal_i = self.goal_i
+        join = self.join
+        w = self.w
+        nbr = self.nbr
+        steps = tuple(zip(BITS, self.offsets))
+        stop = self.expanded + max_expansions
+        for _ in range(max_expansions):
+            if not open_set:
+                self.path = []
+                return True
+            i = heapq.heappop(open_set) & id_mask
+            if closed[i] == gen:
+                continue
+            if i == goal_i:
+                self.path = self._trace(i)
+                return True
+            if join is not None:
+                rest = join((i % w, i // w))
+                if rest is not None:
+                    self.path = self._trace(i) + rest[1:]
+                    return True
+            closed[i] = gen
+            self.expanded += 1
+            if self.jps:
+                self._expand_jps(i)
+                if self.expanded >= stop:
+                    return False
+                continue
+            ng = g[i] + 1
+            mask = nbr[i]
+            for bit, off in steps:
+                if mask & bit:
+                    j = i + off
+                    if closed[j] == gen:
+                        continue
+                    if seen[j] != gen or ng < g[j]:
+                        seen[j] = gen
+                        g[j] = ng
+                        parent[j] = i
+                        self._push(j, ng)
+        return False
+
+    def _expand_jps(self, i):
+        space = self.space
+        g = space.g
+        gen = self.gen
+        w = self.w
+        mask = self.nbr[i]
+        p = space.parent[i]
+        if p < 0:
+            dirs = (0, 1, 2, 3)
+        elif p // w == i // w:
+            # arrived moving horizontally: carry on, or turn up / down
+            dirs = (0 if i > p else 1, 2, 3)
+        else:
+            dirs = (2 if i > p else 3, 0, 1)
+        for d in dirs:
+            if not mask & BITS[d]:
+                continue
+            j = self._jump(i, d)
+            if j < 0 or space.closed[j] == gen:
+                continue
+            ng = g[i] + (abs(j - i) if d < 2 else abs(j - i) // w)
+            if space.seen[j] != gen or ng < g[j]:
+                space.seen[j] = gen
+                g[j] = ng
+                space.parent[j] = i
+                self._push(j, ng)
+
+    def _jump(self, i, d):
+        # walk from i in direction d (index into STEPS) to the next jump
+        # point: the goal, a tile where a wall beside the walk ends (a
+        # forced turn), or, walking vertically, a tile from which a
+        # horizontal walk finds one. -1 if the walk runs into a wall first.
+        nbr = self.nbr
+        off = self.offsets[d]
+        bit = BITS[d]
+        goal_i = self.goal_i
+        if d < 2:
+            while nbr[i] & bit:
+                i += off
+                self.expanded += 1
+                if i == goal_i:
+                    return i
+                m = nbr[i]
+                pm = nbr[i - off]
+                if (m & 4 and not pm & 4) or (m & 8 and not pm & 8):
+                    return i
+            return -1
+        while nbr[i] & bit:
+            i += off
+            self.expanded += 1
+            if i == goal_i:
+                return i
+            m = nbr[i]
+            pm = nbr[i - off]
+            if (m & 1 and not pm & 1) or (m & 2 and not pm & 2):
+                return i
+            if self._jump(i, 0) >= 0 or self._jump(i, 1) >= 0:
+                return i
+        return -1
+
+    def _trace(self, i):
+        # parent chain back to the start, as tiles; jump-point gaps are
+        # straight runs and get filled in
+        w = self.w
+        parent = self.space.parent
+        chain = [i]
+        while parent[i] >= 0:
+            i = parent[i]
+            chain.append(i)
+        chain.reverse()
+        path = [(chain[0] % w, chain[0] // w)]
+        for a, b in zip(chain, chain[1:]):
+            if abs(b - a) == 1 or abs(b - a) == w:
+                path.append((b % w, b // w))
+                continue
+            step = (1 if b > a else -1) if a // w == b // w else (w if b > a else -w)
+            for k in range(a + step, b + step, step):
+                path.append((k % w, k // w))
+        return path
+
+def astar(grid, start, goal, jps=False):
+    search = AStarSearch(grid, start, goal, jps=jps)
+    while not search.step(1 << 30):
+        pass
+    return search.path
+
+class FlowField:
+    # Step distance from every reachable tile to `goal` (4-connected, unit
+    # cost, same as astar), stored flat by tile index. Unreached tiles are -1.
+    # build=False leaves the BFS to be run in slices with expand().
+    def __init__(self, grid, goal, build=True):
+        self.goal = goal
+        self.w = grid.w
+        self.h = grid.h
+        self.version = grid.version
+        self.dist = [-1] * (self.w * self.h)
+        self.nbr = grid.nbr
+        self.offsets = grid.offsets
+        self.frontier = deque()
+        # tiles settled so far (the scheduler's unit of work, like AStarSearch.expanded)
+        self.expanded = 0
+        gx, gy = goal
+        if not grid.is_wall(gx, gy):
+            start = grid.index(gx, gy)
+            self.dist[start] = 0
+            self.frontier.append(start)
+        if build:
+            self.expand(len(self.dist))
+
+    @property
+    def done(self):
+        return not self.frontier
+
+    def expand(self, max_tiles):
+        # settle up to max_tiles more tiles; True once the field is complete
+        dist = self.dist
+        nbr = self.nbr
+        offsets = self.offsets
+        frontier = self.frontier
+        for _ in range(max_tiles):
+            if not frontier:
+                return True
+            i = frontier.popleft()
+            self.expanded += 1
+            d = dist[i] + 1
+            mask = nbr[i]
+            for bit in range(4):
+                if mask & (1 << bit):
+                    j = i + offsets[bit]
+                    if dist[j] < 0:
+                        dist[j] = d
+                        frontier.append(j)
+        return not frontier
+
+    def distance(self, tile):
+        tx, ty = tile
+        if 0 <= tx < self.w and 0 <= ty < self.h:
+            return self.dist[ty * self.w + tx]
+        return -1
+
+    def next_step(self, tile):
+        d = self.distance(tile)
+        if d <= 0:
+            return None
+        tx, ty = tile
+        for dx, dy in STEPS:
+            nb = (tx + dx, ty + dy)
+            if self.distance(nb) == d - 1:
+                return nb
+        return None
+
+    def path_from(self, start, join=None):
+        # same shape astar returns: [start, ..., goal], or [] if unreachable.
+        # join(tile) may return a known path from tile to the goal; the walk
+        # stops at the first tile it has one for and appends it.
+        if self.distance(start) < 0:
+            return []
+        path = []
+        tile = start
+        while tile is not None:
+            if join is not None:
+                rest = join(tile)
+                if rest is not None:
+                    path.extend(rest)
+                    return path
+            path.append(tile)
+            tile = self.next_step(tile)
+        return path
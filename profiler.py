@@ -0,0 +1,100 @@
+# Frame profiler: wall time per main-loop phase for every frame. Keeps a
+# rolling window per phase for p50/p95/p99 (the F3 overlay), a ring of recent
+# frames plus the worst frames seen, and dumps both when the game exits.
+# Phases that run several times in a frame (sim ticks) add up.
+
+import os, csv, json, time, heapq
+from collections import deque
+import numpy as np
+
+DUMP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profile")
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.current[self.name] += time.perf_counter() - self.start
+
+class FrameProfiler:
+    def __init__(self, phases, window=600, trace_len=18000, worst_len=50):
+        self.phases = list(phases)
+        # "other" is frame time not covered by any phase
+        self.columns = self.phases + ["other", "frame"]
+        self.window = {name: deque(maxlen=window) for name in self.columns}
+        self.trace = deque(maxlen=trace_len)
+        self.worst = []
+        self.worst_len = worst_len
+        self.current = dict.fromkeys(self.phases, 0.0)
+        self._contexts = {name: _Phase(self, name) for name in self.phases}
+        self.frame_no = 0
+        self.frame_start = None
+        self.session_start = time.perf_counter()
+
+    def phase(self, name):
+        return self._contexts[name]
+
+    def begin_frame(self):
+        for name in self.current:
+            self.current[name] = 0.0
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if self.frame_start is None:
+            return
+        now = time.perf_counter()
+        frame_ms = (now - self.frame_start) * 1000
+        row = [self.current[name] * 1000 for name in self.phases]
+        row.append(max(0.0, frame_ms - sum(row)))
+        row.append(frame_ms)
+        for name, ms in zip(self.columns, row):
+            self.window[name].append(ms)
+        entry = (self.frame_no, round(self.frame_start - self.session_start, 4), row)
+        self.trace.append(entry)
+        if len(self.worst) < self.worst_len:
+            heapq.heappush(self.worst, (frame_ms, entry))
+        elif frame_ms > self.worst[0][0]:
+            heapq.heapreplace(self.worst, (frame_ms, entry))
+        self.frame_no += 1
+        self.frame_start = None
+
+    def percentiles(self, name, qs=(50, 95, 99)):
+        samples = self.window[name]
+        if not samples:
+            return [0.0] * len(qs)
+        return np.percentile(np.fromiter(samples, dtype=np.float64, count=len(samples)), qs).tolist()
+
+    def summary(self):
+        out = {}
+        for name in self.columns:
+            p50, p95, p99 = self.percentiles(name)
+            samples = self.window[name]
+            out[name] = {"p50": p50, "p95": p95, "p99": p99,
+                         "max": max(samples) if samples else 0.0}
+        return out
+
+    def dump(self, directory=DUMP_DIR):
+        # frame_trace.csv: the most recent frames, one row each (ms per phase)
+        # frame_summary.json: rolling percentiles + the worst frames of the session
+        if not self.trace:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "frame_trace.csv"), "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "t"] + self.columns)
+            for frame_no, t, row in self.trace:
+                writer.writerow([frame_no, t] + [round(ms, 4) for ms in row])
+        worst = []
+        for frame_ms, (frame_no, t, row) in sorted(self.worst, key=lambda item: item[0], reverse=True):
+            worst.append({"frame": frame_no, "t": t,
+                          "phases": {name: round(ms, 4) for name, ms in zip(self.columns, row)}})
+        with open(os.path.join(directory, "frame_summary.json"), "w") as f:
+            json.dump({"frames": self.frame_no, "window": self.summary(), "worst_frames": worst}, f, indent=2)
+        return directory
@@ -0,0 +1,118 @@
+# Uniform-grid spatial index for things that move around the world (enemies,
+# NPCs, interactables). Queries only look at the cells a circle / cone can
+# reach, so their cost follows how many entities are nearby, not how many exist.
+
+import math
+
+class SpatialHash:
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.cells = {}
+        # id(item) -> [item, cell, x, y, radius]; items themselves may be unhashable dicts
+        self.entries = {}
+        self.max_radius = 0
+
+    def _cell(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, item):
+        return id(item) in self.entries
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+        self.max_radius = 0
+
+    def insert(self, item, x, y, radius=0):
+        key = id(item)
+        if key in self.entries:
+            self.move(item, x, y, radius)
+            return
+        cell = self._cell(x, y)
+        self.entries[key] = [item, cell, x, y, radius]
+        self.cells.setdefault(cell, {})[key] = item
+        if radius > self.max_radius:
+            self.max_radius = radius
+
+    def move(self, item, x, y, radius=None):
+        key = id(item)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.insert(item, x, y, radius or 0)
+            return
+        cell = self._cell(x, y)
+        if cell != entry[1]:
+            bucket = self.cells[entry[1]]
+            del bucket[key]
+            if not bucket:
+                del self.cells[entry[1]]
+            self.cells.setdefault(cell, {})[key] = item
+            entry[1] = cell
+        entry[2] = x
+        entry[3] = y
+        if radius is not None:
+            entry[4] = radius
+            if radius > self.max_radius:
+                self.max_radius = radius
+
+    def remove(self, item):
+        entry = self.entries.pop(id(item), None)
+        if entry is None:
+            return
+        bucket = self.cells[entry[1]]
+        del bucket[id(item)]
+        if not bucket:
+            del self.cells[entry[1]]
+
+    def _candidates(self, x, y, reach):
+        cs = self.cell_size
+        cells = self.cells
+        entries = self.entries
+        for cy in range(int((y - reach) // cs), int((y + reach) // cs) + 1):
+            for cx in range(int((x - reach) // cs), int((x + reach) // cs) + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for key in bucket:
+                        yield entries[key]
+
+    def query_radius(self, x, y, r):
+        # items whose body (centre + radius) overlaps the circle
+        out = []
+        for item, _, ix, iy, ir in self._candidates(x, y, r + self.max_radius):
+            dx = ix - x
+            dy = iy - y
+            reach = r + ir
+            if dx * dx + dy * dy <= reach * reach:
+                out.append(item)
+        return out
+
+    def query_arc(self, x, y, r, angle, arc):
+        # query_radius restricted to a cone of width `arc` (radians) around `angle`
+        half = arc / 2
+        out = []
+        for item, _, ix, iy, ir in self._candidates(x, y, r + self.max_radius):
+            dx = ix - x
+            dy = iy - y
+            reach = r + ir
+            if dx * dx + dy * dy > reach * reach:
+                continue
+            diff = abs((math.atan2(dy, dx) - angle + math.pi) % (2 * math.pi) - math.pi)
+            if diff <= half:
+                out.append(item)
+        return out
+
+    def nearest(self, x, y, r, accept=None):
+        # closest item centre strictly within r, optionally filtered by accept(item)
+        best = None
+        best_d = r
+        for item, _, ix, iy, _ in self._candidates(x, y, r):
+            if accept is not None and not accept(item):
+                continue
+            d = math.hypot(ix - x, iy - y)
+            if d < best_d:
+                best = item
+                best_d = d
+        return best
@@ -0,0 +1,68 @@
+# On-disk cache of sliced / scaled frames so warm starts skip PNG decode and smoothscale.
+#
+# Each entry is two files in CACHE_DIR:
+#   <stem>-<stamp>.bin   raw RGBA pixels of every frame, back to back
+#   <stem>-<stamp>.json  frame sizes plus whatever metadata the caller stored
+# <stem> identifies the source path + slice parameters, <stamp> its mtime/size,
+# so editing an asset simply misses and the stale entry is replaced.
+
+import os, json, mmap, hashlib
+import pygame
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".frame_cache")
+CACHE_VERSION = 1
+
+def _entry_names(path, params):
+    st = os.stat(path)
+    ident = repr((CACHE_VERSION, os.path.abspath(path), params))
+    stem = hashlib.sha1(ident.encode("utf-8")).hexdigest()[:16]
+    stamp = "%x-%x" % (st.st_mtime_ns, st.st_size)
+    return stem, stem + "-" + stamp
+
+def load(path, params, convert=True):
+    # convert=False leaves frames as plain RGBA surfaces (safe off the main thread)
+    try:
+        _, name = _entry_names(path, params)
+        with open(os.path.join(CACHE_DIR, name + ".json"), "r") as f:
+            meta = json.load(f)
+        data_file = open(os.path.join(CACHE_DIR, name + ".bin"), "rb")
+    except (OSError, ValueError):
+        return None
+    frames = []
+    try:
+        with data_file, mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                offset = 0
+                for w, h in meta["sizes"]:
+                    n = w * h * 4
+                    raw = pygame.image.frombuffer(view[offset:offset + n], (w, h), "RGBA")
+                    frames.append(raw.convert_alpha() if convert else raw.copy())
+                    del raw  # drop the buffer export before the map closes
+                    offset += n
+            finally:
+                view.release()
+    except (OSError, ValueError, KeyError, BufferError) as ex:
+        print(f"Frame cache entry for '{path}' unreadable, rebuilding: {ex}")
+        return None
+    return {"frames": frames, "meta": meta.get("meta", {})}
+
+def store(path, params, frames, meta=None):
+    try:
+        stem, name = _entry_names(path, params)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        for old in os.listdir(CACHE_DIR):
+            if old.startswith(stem + "-") and not old.startswith(name + "."):
+                os.remove(os.path.join(CACHE_DIR, old))
+        base = os.path.join(CACHE_DIR, name)
+        with open(base + ".bin.tmp", "wb") as f:
+            for frame in frames:
+                f.write(pygame.image.tobytes(frame, "RGBA"))
+        os.replace(base + ".bin.tmp", base + ".bin")
+        # metadata goes last: an entry without its .json is just a miss
+        with open(base + ".json.tmp", "w") as f:
+            json.dump({"source": path, "sizes": [list(fr.get_size()) for fr in frames],
+                       "meta": meta or {}}, f)
+        os.replace(base + ".json.tmp", base + ".json")
+    except OSError as ex:
+        print(f"Could not write frame cache for '{path}': {ex}")
@@ -0,0 +1,61 @@
+# Reusable surfaces for per-frame overlays and FX, so a busy fight doesn't
+# allocate a fresh SRCALPHA surface for every circle, ring and overlay.
+
+import pygame
+from collections import OrderedDict
+
+class SurfacePool:
+    # Scratch SRCALPHA surfaces bucketed by size. Everything acquired during a
+    # frame goes back on the free lists in end_frame().
+    BUCKET = 32
+
+    def __init__(self):
+        self._free = {}
+        self._in_use = []
+        self.created = 0
+
+    def acquire(self, w, h):
+        bw = -(-w // self.BUCKET) * self.BUCKET
+        bh = -(-h // self.BUCKET) * self.BUCKET
+        free = self._free.get((bw, bh))
+        if free:
+            base = free.pop()
+        else:
+            base = pygame.Surface((bw, bh), pygame.SRCALPHA)
+            self.created += 1
+        self._in_use.append(((bw, bh), base))
+        # hand out a subsurface so per-use state (set_alpha etc.) never sticks to the pooled base
+        surf = base.subsurface((0, 0, w, h))
+        surf.fill((0, 0, 0, 0))
+        return surf
+
+    def end_frame(self):
+        for key, base in self._in_use:
+            self._free.setdefault(key, []).append(base)
+        self._in_use.clear()
+
+class SpriteCache:
+    # Pre-baked FX sprites (rings, circles, tints, fills) keyed by whatever
+    # describes them; least recently used entries are dropped past capacity.
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self.created = 0
+
+    def get(self, key, build):
+        surf = self._items.get(key)
+        if surf is None:
+            surf = build()
+            self._items[key] = surf
+            self.created += 1
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+        else:
+            self._items.move_to_end(key)
+        return surf
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)